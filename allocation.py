@@ -0,0 +1,86 @@
+import numpy as np
+
+from backtest import BENCHMARK_ASSET, DEFENSIVE_ASSETS, STRATEGY_ASSETS, momentum_weights
+
+
+# 요청 하나에 받을 수 있는 최대 계좌 수
+MAX_ACCOUNTS = 100000
+
+
+class AllocationError(ValueError):
+    pass
+
+
+# 스냅샷 마지막 날 기준 목표 비중: 백테스트와 같은 규칙(backtest.momentum_weights)에
+# 최근 1년 수익률(공격)과 6개월 수익률(방어)을 넣음. 비중이 0인 종목은 빼고, 남는 몫은 현금
+# 기준자산 1년 수익을 계산할 수 없으면(가격 기록이 1년보다 짧음) 'cash'로 전부 현금
+def target_weights(snapshot):
+    offensive_returns = snapshot.returns_1y[list(STRATEGY_ASSETS)].iloc[-1].to_numpy(dtype=np.float64)
+    defensive_returns = snapshot.returns_6m[list(DEFENSIVE_ASSETS)].iloc[-1].to_numpy(dtype=np.float64)
+    weights = momentum_weights(offensive_returns, defensive_returns, STRATEGY_ASSETS)
+    benchmark_return = offensive_returns[STRATEGY_ASSETS.index(BENCHMARK_ASSET)]
+    regime = 'cash' if np.isnan(benchmark_return) else 'risk_on' if benchmark_return > 0 else 'risk_off'
+    return regime, {asset: float(weight) for asset, weight in zip(STRATEGY_ASSETS, weights) if weight > 0}
+
+
+def _parse_accounts(accounts):
+    if not isinstance(accounts, list) or not accounts:
+        raise AllocationError('accounts는 비어 있지 않은 배열이어야 합니다.')
+    if len(accounts) > MAX_ACCOUNTS:
+        raise AllocationError(f'계좌는 한 번에 {MAX_ACCOUNTS:,}개까지 요청할 수 있습니다.')
+
+    ids, amounts, reserves = [], np.empty(len(accounts)), np.zeros(len(accounts))
+    for i, account in enumerate(accounts):
+        if not isinstance(account, dict):
+            raise AllocationError(f'{i}번째 계좌 형식이 잘못되었습니다.')
+        try:
+            amounts[i] = float(account['amount'])
+            constraints = account.get('constraints') or {}
+            reserves[i] = float(constraints.get('cash_reserve', 0))
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise AllocationError(f'{i}번째 계좌의 amount / constraints 값이 잘못되었습니다.')
+        ids.append(account.get('account_id', i))
+    if not np.isfinite(amounts).all() or (amounts < 0).any():
+        raise AllocationError('amount는 0 이상의 숫자여야 합니다.')
+    if not np.isfinite(reserves).all() or (reserves < 0).any():
+        raise AllocationError('cash_reserve는 0 이상의 숫자여야 합니다.')
+    return ids, amounts, reserves
+
+
+# 여러 계좌의 주문 수량을 한 스냅샷 가격으로 한 번에 계산
+# accounts: [{'account_id': ..., 'amount': 10000, 'constraints': {'cash_reserve': 500}}, ...]
+def allocate(snapshot, accounts):
+    ids, amounts, reserves = _parse_accounts(accounts)
+    regime, weights = target_weights(snapshot)
+
+    tickers = list(weights)
+    prices = snapshot.last_close[tickers].to_numpy(dtype=np.float64) if tickers else np.empty(0)
+    weight_vector = np.array([weights[ticker] for ticker in tickers])
+
+    investable = np.maximum(amounts - reserves, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = np.floor(investable[:, None] * weight_vector[None, :] / prices[None, :])
+    shares = np.where(np.isfinite(shares), shares, 0).astype(np.int64)
+    invested = shares @ prices if tickers else np.zeros(len(amounts))
+    cash = amounts - invested
+
+    allocations = [
+        {
+            'account_id': account_id,
+            'amount': float(amount),
+            'positions': [
+                {'ticker': ticker, 'shares': int(count), 'price': float(price), 'value': float(count * price)}
+                for ticker, count, price in zip(tickers, row, prices) if count
+            ],
+            'invested': float(total),
+            'cash': float(left),
+        }
+        for account_id, amount, row, total, left in zip(ids, amounts, shares, invested, cash)
+    ]
+    return {
+        'snapshot': snapshot.info(),
+        'regime': regime,
+        'weights': weights,
+        'prices': dict(zip(tickers, prices.tolist())),
+        'allocations': allocations,
+    }
@@ -1,73 +1,125 @@
-import yfinance as yf
 import plotly.graph_objects as go
 from dash import dcc, html, Dash
 from dash.dependencies import Input, Output, State
+import numpy as np
 import pandas as pd
 import dash  # Import dash here
-from flask import Flask
+import os
+import threading
+from urllib.parse import urlencode
+from dash.dependencies import ClientsideFunction
+from flask import Flask, abort, jsonify, request
+from allocation import AllocationError, allocate, target_weights
+from figure_cache import FigureCache, figure_response, install_compression
+import metrics
+from live import LIVE_POLL_MS, LiveSession, default_feed
+from payload import COMPACT_FIGURES, compact_figure, encode_array, encode_dates
+from price_store import default_store
+from simulation import SIMULATION_YEARS
+from snapshot import SnapshotRefresher
+from universe import DEFAULT_ASSETS, load_universe, top_k
+from windows import LOOKBACK_MONTHS
 
 
 
-# Flask 서버 객체 생성
-server = Flask(__name__)
+# 자산 설명 (기본 11개 ETF + UNIVERSE_FILE에 있는 종목)
+assets = load_universe()
 
-# Dash 애플리케이션 초기화
-app = Dash(__name__, server=server, assets_folder="assets")
+# 시장 데이터 스냅샷 (백그라운드에서 주기적으로 다시 만들어 통째로 교체)
+# 가격 제공자 요청은 지연시간/실패 수를 기록하도록 감쌈
+store = default_store()
+store.provider = metrics.InstrumentedProvider(store.provider)
+# import 시에는 만들기만 하고, 데이터 읽기/갱신은 create_app()에서 시작
+snapshots = SnapshotRefresher(store, assets.keys())
 
+# 종목/해상도 전환을 브라우저에서 처리하는 모드 (CLIENTSIDE_SWITCHING=0이면 서버 콜백으로 그림을 만듦)
+# 종목 수가 CLIENTSIDE_MAX_ASSETS를 넘으면 데이터가 너무 커지므로 서버 콜백을 사용
+CLIENTSIDE_MAX_ASSETS = int(os.environ.get('CLIENTSIDE_MAX_ASSETS', '200'))
+CLIENTSIDE_SWITCHING = os.environ.get('CLIENTSIDE_SWITCHING', '1') != '0' and len(assets) <= CLIENTSIDE_MAX_ASSETS
 
-# 자산 설명
-assets = {
-    'SPLG': 'SPLG는 S&P 500 지수를 추적하는 ETF입니다.',
-    'QQQM': 'QQQM은 NASDAQ-100 지수를 추적하는 ETF입니다.',
-    'EFA': 'EFA는 북미 외의 선진국 대형주를 추적하는 ETF입니다.',
-    'SHY': 'SHY는 단기 미국 국채를 추적하는 ETF입니다.',
-    'IEF': 'IEF는 중기 미국 국채를 추적하는 ETF입니다.',
-    'TLT': 'TLT는 장기 미국 국채를 추적하는 ETF입니다.',
-    'TIP': 'TIP는 미국 물가 연동 채권(TIPS)을 추적하는 ETF입니다.',
-    'LQD': 'LQD는 투자적격 등급의 회사채를 추적하는 ETF입니다.',
-    'HYG': 'HYG는 고수익(정크) 회사채를 추적하는 ETF입니다.',
-    'RWX': 'RWX는 국제 부동산 투자 신탁(REITs)을 추적하는 ETF입니다.',
-    'EMB': 'EMB는 신흥 시장 채권을 추적하는 ETF입니다.'
-}
+# 서버 콜백이 /figures 주소를 주면 브라우저가 받아서 그리는 그래프 (브라우저 모드의 수익률 그래프는 market-data로 그림)
+FIGURE_GRAPHS = ([] if CLIENTSIDE_SWITCHING else ['return-each', 'return-plot-1y', 'return-plot-6m']) + [
+    'backtest-plot', 'correlation-heatmap', 'simulation-plot', 'simulation-drawdown']
 
-# 1년치 데이터 다운로드
-data = yf.download(list(assets.keys()), period='1y')
+# 수익률 비교 그래프에 한 번에 그릴 최대 종목 수 (초과 시 전략 자산 + 최근 수익률 상위 종목만)
+MAX_PLOT_ASSETS = int(os.environ.get('MAX_PLOT_ASSETS', '30'))
 
-# 6개월치 데이터 다운로드
-data_6m = yf.download(list(assets.keys()), period='6mo')
+# 설명 카드를 보여줄 최대 종목 수
+MAX_DESCRIPTION_CARDS = int(os.environ.get('MAX_DESCRIPTION_CARDS', '50'))
+described_assets = [(asset, description) for asset, description in assets.items() if description][:MAX_DESCRIPTION_CARDS]
 
-# 종가(Close) 데이터 추출
-close_data = data['Adj Close']
-close_data_6m = data_6m['Adj Close']
-# close_data = data['Close']  # 'Adj Close' 대신 'Close'를 사용
+# 모멘텀 순위 표에 보여줄 종목 수
+MOMENTUM_TOP_K = int(os.environ.get('MOMENTUM_TOP_K', '20'))
 
+# 브라우저의 스냅샷 데이터가 최신인지 확인하는 주기 (밀리초)
+MARKET_DATA_POLL_MS = int(os.environ.get('MARKET_DATA_POLL_MS', '600000'))
 
-# 수익률 계산 (수익률 = (현재 가격 / 시작 가격) - 1)
-returns_1y = close_data / close_data.iloc[0] - 1
+# 장중 실시간 모드 (LIVE_QUOTES=simulated|yahoo): 시세가 들어올 때마다 배너/순위를 바꾸고 수익률 그래프에 점을 이어 붙임
+live_feed = default_feed()
+live_session = LiveSession(live_feed, k=MOMENTUM_TOP_K) if live_feed else None
 
-# 최근 6개월 데이터 추출
-returns_6m = close_data_6m / close_data_6m.iloc[0] - 1  # 6개월 동안의 수익률
+# 직렬화된 그림 캐시 (스냅샷 버전이 키에 들어가므로 데이터가 바뀌면 자연히 새로 만듦)
+figure_cache = FigureCache()
 
-# 일봉, 주봉, 월봉 데이터 생성
-daily_returns = close_data / close_data.iloc[0] - 1
-weekly_returns = close_data.resample('W').last() / close_data.resample('W').last().iloc[0] - 1
-monthly_returns = close_data.resample('ME').last() / close_data.resample('ME').last().iloc[0] - 1  # Changed 'M' to 'ME'
+# year6month와 일봉/주봉/월봉에 따른 수익률 데이터 선택 함수
+def get_returns_by_period(snapshot, period, data_type):
+    if period == 'year':
+        if data_type == 'daily':
+            return snapshot.daily_returns
+        elif data_type == 'weekly':
+            return snapshot.weekly_returns
+        elif data_type == 'monthly':
+            return snapshot.monthly_returns
+    elif period == '6month':
+        if data_type == 'daily':
+            return snapshot.daily_returns_6m
+        elif data_type == 'weekly':
+            return snapshot.weekly_returns_6m
+        elif data_type == 'monthly':
+            return snapshot.monthly_returns_6m
+    raise KeyError((period, data_type))
+
+
+# 큰 유니버스에서는 전략 자산과 마지막 수익률 상위 종목만 그래프에 그림
+def select_plot_assets(returns, max_assets=MAX_PLOT_ASSETS):
+    if len(returns.columns) <= max_assets:
+        return returns
+    strategy_assets = [asset for asset in DEFAULT_ASSETS if asset in returns.columns]
+    others = returns.columns.difference(strategy_assets, sort=False)
+    picks = top_k(returns[others].ffill().iloc[-1].to_numpy(), max(max_assets - len(strategy_assets), 0))
+    return returns[strategy_assets + list(others[picks])]
+
+
+# 일봉/주봉/월봉 선택 버튼 (선택한 해상도의 데이터만 서버에서 받아옴)
+def resolution_selector(component_id):
+    return dcc.RadioItems(
+        id=component_id,
+        options=[{'label': '일봉', 'value': 'daily'},
+                 {'label': '주봉', 'value': 'weekly'},
+                 {'label': '월봉', 'value': 'monthly'}],
+        value='daily',
+        inline=True,
+        inputStyle={'marginRight': '5px'},
+        labelStyle={'marginRight': '15px'},
+        style={'textAlign': 'center'}
+    )
+
+
+# 자산을 원하는 순서로 추가 (SPLG, QQQM, EFA) - 범례 순서 설정
+def plot_order(columns):
+    priority_assets = ['SPLG', 'QQQM', 'EFA']
+    available_priority_assets = [asset for asset in priority_assets if asset in columns]
+    other_assets = [asset for asset in columns if asset not in available_priority_assets]
+
+    # 모든 자산을 포함한 리스트 (범례 순서에 맞추어야 함)
+    return available_priority_assets + other_assets
 
-daily_returns_6m = close_data_6m / close_data_6m.iloc[0] - 1
-weekly_returns_6m = close_data_6m.resample('W').last() / close_data_6m.resample('W').last().iloc[0] - 1
-monthly_returns_6m = close_data_6m.resample('ME').last() / close_data_6m.resample('ME').last().iloc[0] - 1  # Changed 'M' to 'ME'
 
 # 그래프 생성 함수
 def create_return_plot(returns, year6month):
     fig = go.Figure()
 
-    # 자산을 원하는 순서로 추가 (SPLG, QQQM, EFA) - 범례 순서 설정
-    priority_assets = ['SPLG', 'QQQM', 'EFA']
-    available_priority_assets = [asset for asset in priority_assets if asset in returns.columns]
-    other_assets = [asset for asset in returns.columns if asset not in available_priority_assets]
-    
-    # 모든 자산을 포함한 리스트 (범례 순서에 맞추어야 함)
-    ordered_assets = available_priority_assets + other_assets
+    ordered_assets = plot_order(returns.columns)
 
     # SPLG, QQQM, EFA를 가장 위에 추가
     for asset in ordered_assets:
@@ -78,23 +130,6 @@ def create_return_plot(returns, year6month):
             name=asset,
         ))
         
-         # year6month에 따른 데이터 선택 함수
-    def get_data_by_period(period, data_type):
-        if period == 'year':
-            if data_type == 'daily':
-                return daily_returns
-            elif data_type == 'weekly':
-                return weekly_returns
-            elif data_type == 'monthly':
-                return monthly_returns
-        elif period == '6month':
-            if data_type == 'daily':
-                return daily_returns_6m
-            elif data_type == 'weekly':
-                return weekly_returns_6m
-            elif data_type == 'monthly':
-                return monthly_returns_6m
-
     # 레이아웃 설정
     fig.update_layout(
         xaxis_title='Date',
@@ -103,38 +138,6 @@ def create_return_plot(returns, year6month):
         hovermode='x unified',
         legend_title_text='자산',
         updatemenus=[
-            dict(
-                type="buttons",
-                showactive=True,
-                buttons=[
-                    dict(
-                        args=[{"x": [get_data_by_period(year6month, 'daily').index] * len(ordered_assets),
-                               "y": [get_data_by_period(year6month, 'daily')[asset] for asset in ordered_assets],
-                               "visible": [True] * len(ordered_assets)}],
-                        label="일봉",
-                        method="update"
-                    ),
-                    dict(
-                        args=[{"x": [get_data_by_period(year6month, 'weekly').index] * len(ordered_assets),
-                               "y": [get_data_by_period(year6month, 'weekly')[asset] for asset in ordered_assets],
-                               "visible": [True] * len(ordered_assets)}],
-                        label="주봉",
-                        method="update"
-                    ),
-                    dict(
-                        args=[{"x": [get_data_by_period(year6month, 'monthly').index] * len(ordered_assets),
-                               "y": [get_data_by_period(year6month, 'monthly')[asset] for asset in ordered_assets],
-                               "visible": [True] * len(ordered_assets)}],
-                        label="월봉",
-                        method="update"
-                    )
-                ],
-                direction="left",
-                x=0.5,
-                xanchor="center",
-                y=1.15,
-                yanchor="top"
-            ),
             dict(
                 type="buttons",
                 showactive=False,
@@ -163,28 +166,8 @@ def create_return_plot(returns, year6month):
 
 
 
-# MACD와 RSI 계산 함수
-def calculate_macd_rsi(data, short_window=12, long_window=26, signal_window=9, rsi_window=14):
-    # MACD 계산
-    short_ema = data.ewm(span=short_window, adjust=False).mean()
-    long_ema = data.ewm(span=long_window, adjust=False).mean()
-    macd = short_ema - long_ema
-    signal = macd.ewm(span=signal_window, adjust=False).mean()
-    macd_osc = macd - signal
-
-    # RSI 계산
-    delta = data.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=rsi_window).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=rsi_window).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    
-    return macd_osc, rsi
-
-
-
 # 한 종목 선택시 그래프 생성 함수
-def create_return_each(returns, title, selected_asset=None):
+def create_return_each(returns, title, indicators, selected_asset=None):
     fig = go.Figure()
 
     # 선택된 종목이 없으면 전체 자산 표시
@@ -196,8 +179,9 @@ def create_return_each(returns, title, selected_asset=None):
             name=selected_asset,
         ))
         
-        # MACD, RSI 계산 및 추가
-        macd_osc, rsi = calculate_macd_rsi(close_data[selected_asset])
+        # 스냅샷에 미리 계산된 MACD, RSI 조회 및 추가
+        macd_osc = indicators.series('macd_osc', selected_asset).loc[returns.index[0]:]
+        rsi = indicators.series('rsi', selected_asset).loc[returns.index[0]:]
         fig.add_trace(go.Scatter(
             x=macd_osc.index,
             y=macd_osc,
@@ -239,8 +223,9 @@ def create_return_each(returns, title, selected_asset=None):
             name='SPLG',
         ))
         
-        # MACD, RSI 계산 및 추가
-        macd_osc, rsi = calculate_macd_rsi(close_data['SPLG'])
+        # 스냅샷에 미리 계산된 MACD, RSI 조회 및 추가
+        macd_osc = indicators.series('macd_osc', 'SPLG').loc[returns.index[0]:]
+        rsi = indicators.series('rsi', 'SPLG').loc[returns.index[0]:]
         fig.add_trace(go.Scatter(
             x=macd_osc.index,
             y=macd_osc,
@@ -286,12 +271,217 @@ def create_return_each(returns, title, selected_asset=None):
 
     return fig
 
+# 백테스트 평가금액 / 낙폭 그래프 생성 함수
+def create_backtest_plot(result):
+    fig = go.Figure()
+    if result is None:
+        fig.update_layout(title='백테스트할 데이터가 부족합니다.')
+        return fig
+
+    equity = result.equity
+    drawdown = equity / equity.cummax() - 1
+    fig.add_trace(go.Scatter(
+        x=equity.index,
+        y=equity - 1,
+        mode='lines',
+        name='누적 수익률',
+    ))
+    fig.add_trace(go.Scatter(
+        x=drawdown.index,
+        y=drawdown,
+        mode='lines',
+        name='낙폭',
+        fill='tozeroy',
+        yaxis='y2'
+    ))
+    fig.update_layout(
+        xaxis_title='Date',
+        yaxis_title='Cumulative Return (%)',
+        yaxis_tickformat='.0%',
+        yaxis2=dict(
+            title='Drawdown',
+            overlaying='y',
+            side='right',
+            showgrid=False,
+            tickformat='.0%'
+        ),
+        hovermode='x unified',
+        legend_title_text='변형듀얼모멘텀',
+    )
+    return fig
+
+
+# 백테스트 요약과 최근 12개월 보유 종목 표
+def create_backtest_summary(result):
+    if result is None:
+        return []
+    summary = result.summary()
+    holdings = result.holdings.tail(12).iloc[::-1]
+    rows = [
+        html.Tr([
+            html.Td(date.strftime('%Y-%m'), style={'padding': '2px 10px'}),
+            html.Td(', '.join(f'{asset} {weight:.0%}' for asset, weight in row.items() if weight > 1e-9),
+                    style={'padding': '2px 10px'}),
+        ]) for date, row in holdings.iterrows()
+    ]
+    return [
+        html.P(f"{summary['start']} ~ {summary['end']} · 연평균 수익률(CAGR) {summary['cagr']:.2%} · "
+               f"최대 낙폭(MDD) {summary['max_drawdown']:.2%} · 샤프 지수 {summary['sharpe']:.2f} · "
+               f"월평균 회전율 {summary['avg_turnover']:.1%}"),
+        html.Table([html.Tr([html.Th('리밸런싱'), html.Th('보유 비중')])] + rows,
+                   style={'margin': '0 auto', 'fontSize': '14px'}),
+    ]
+
+
+# 자산 간 상관계수 히트맵
+def create_correlation_heatmap(correlation, window):
+    fig = go.Figure(go.Heatmap(
+        z=correlation.to_numpy(),
+        x=list(correlation.columns),
+        y=list(correlation.index),
+        zmin=-1,
+        zmax=1,
+        colorscale='RdBu_r',
+        hovertemplate='%{y} / %{x}: %{z:.2f}<extra></extra>'
+    ))
+    fig.update_layout(
+        title=f'최근 {window}거래일 일간 수익률 상관계수',
+        yaxis_autorange='reversed',
+    )
+    return fig
+
+
+# 자산별 변동성 / 샤프 / 낙폭 표
+def create_risk_table(latest, window):
+    rows = [
+        html.Tr([
+            html.Td(asset, style={'padding': '2px 10px'}),
+            html.Td(f"{row['volatility']:.1%}", style={'padding': '2px 10px'}),
+            html.Td(f"{row['sharpe']:.2f}", style={'padding': '2px 10px'}),
+            html.Td(f"{row['drawdown']:.1%}", style={'padding': '2px 10px'}),
+            html.Td(f"{row['max_drawdown']:.1%}", style={'padding': '2px 10px'}),
+        ]) for asset, row in latest.iterrows()
+    ]
+    header = html.Tr([html.Th('종목'), html.Th(f'변동성({window}일, 연율)'), html.Th(f'샤프({window}일)'),
+                      html.Th('현재 낙폭'), html.Th('최대 낙폭')])
+    return html.Table([header] + rows, style={'margin': '0 auto', 'fontSize': '14px'})
+
+
+# 시작 스냅샷처럼 시뮬레이션이 아직 안 끝났을 때의 빈 그림
+def create_simulation_pending():
+    fig = go.Figure()
+    fig.update_layout(title='시뮬레이션을 계산하는 중입니다. 잠시만 기다려주세요.')
+    return fig
+
+
+# 몬테카를로 시뮬레이션 평가금액 분포 (경과 개월별 백분위 구간)
+def create_simulation_plot(result):
+    fig = go.Figure()
+    if result is None:
+        fig.update_layout(title='시뮬레이션할 데이터가 부족합니다.')
+        return fig
+
+    bands = result.equity_bands - 1
+    months = list(bands.index)
+    for low, high, color in ((5, 95, 'rgba(31, 119, 180, 0.15)'), (25, 75, 'rgba(31, 119, 180, 0.3)')):
+        fig.add_trace(go.Scatter(
+            x=months,
+            y=bands[low],
+            mode='lines',
+            line={'width': 0},
+            name=f'{low}%',
+            showlegend=False
+        ))
+        fig.add_trace(go.Scatter(
+            x=months,
+            y=bands[high],
+            mode='lines',
+            line={'width': 0},
+            fill='tonexty',
+            fillcolor=color,
+            name=f'{high}%',
+            showlegend=False
+        ))
+    fig.add_trace(go.Scatter(
+        x=months,
+        y=bands[50],
+        mode='lines',
+        line={'color': 'rgb(31, 119, 180)'},
+        name='중앙값'
+    ))
+    fig.update_layout(
+        title=f'{result.paths:,}개 경로 · {result.years}년 누적 수익률 분포 (음영: 25~75%, 5~95%)',
+        xaxis_title='경과 개월',
+        yaxis_title='Cumulative Return (%)',
+        yaxis_tickformat='.0%',
+        hovermode='x unified',
+        legend_title_text='변형듀얼모멘텀',
+    )
+    return fig
+
+
+# 몬테카를로 시뮬레이션 경로별 최대 낙폭 분포 (전략 / 기준자산 보유)
+def create_drawdown_distribution(result):
+    fig = go.Figure()
+    if result is None:
+        fig.update_layout(title='시뮬레이션할 데이터가 부족합니다.')
+        return fig
+
+    bins = np.linspace(min(result.max_drawdown.min(), result.benchmark_max_drawdown.min()), 0, 41)
+    centers = (bins[:-1] + bins[1:]) / 2
+    for name, values in (('변형듀얼모멘텀', result.max_drawdown), ('SPLG 보유', result.benchmark_max_drawdown)):
+        counts, _ = np.histogram(values, bins=bins)
+        fig.add_trace(go.Bar(
+            x=centers,
+            y=counts / len(values),
+            name=name,
+            opacity=0.6,
+            hovertemplate='MDD %{x:.1%}: %{y:.1%}<extra></extra>'
+        ))
+    fig.update_layout(
+        title=f'{result.years}년 최대 낙폭(MDD) 분포',
+        barmode='overlay',
+        bargap=0,
+        xaxis_title='Max Drawdown (%)',
+        xaxis_tickformat='.0%',
+        yaxis_title='경로 비율',
+        yaxis_tickformat='.0%',
+    )
+    return fig
+
+
+# 몬테카를로 시뮬레이션 백분위 표
+def create_simulation_summary(result):
+    if result is None:
+        return []
+    table = result.percentiles()
+    rows = [
+        html.Tr([html.Td(name, style={'padding': '2px 10px'})] + [
+            html.Td(f'{value:.1%}', style={'padding': '2px 10px'}) for value in row
+        ]) for name, row in table.iterrows()
+    ]
+    return [
+        html.P(f"과거 {result.sample_start:%Y-%m-%d} ~ {result.sample_end:%Y-%m-%d} 일간 수익률을 "
+               f"{result.block_days}거래일 묶음으로 다시 뽑아 {result.paths:,}개 경로를 만들고 "
+               f"매달 같은 규칙으로 리밸런싱 · 손실 확률 {result.loss_probability():.1%} · "
+               f"MDD -20% 이하 확률 {result.drawdown_probability(-0.2):.1%}"),
+        html.Table([html.Tr([html.Th('항목')] + [html.Th(column) for column in table.columns])] + rows,
+                   style={'margin': '0 auto', 'fontSize': '14px'}),
+    ]
+
+
 # 투자 전략에 따른 투자 판단 함수
-def investment_decision(investment_amount=None):
-    splg_return_1y = returns_1y['SPLG'].iloc[-1]
-    if splg_return_1y > 0:
-        best_asset = returns_1y[['SPLG', 'QQQM', 'EFA']].iloc[-1].idxmax()
-        best_price = close_data[best_asset].iloc[-1]
+def investment_decision(investment_amount=None, snapshot=None):
+    snapshot = snapshot or snapshots.current
+    # 종목 선택은 주문 API / 백테스트와 같은 규칙 (allocation.target_weights)
+    regime, weights = target_weights(snapshot)
+    last_close = snapshot.last_close
+    splg_return_1y = snapshot.returns_1y['SPLG'].iloc[-1]
+    if regime == 'cash':
+        return "SPLG의 최근 1년 수익을 계산할 가격 기록이 없어 판단할 수 없습니다. 전부 현금으로 보유합니다."
+    if regime == 'risk_on':
+        best_asset = next(iter(weights))
+        best_price = last_close[best_asset]
         number_of_shares = int(investment_amount // best_price) if investment_amount else 0
         total_investment = number_of_shares * best_price
         if investment_amount:
@@ -303,18 +493,16 @@ def investment_decision(investment_amount=None):
             return (f"SPLG의 최근 1년 수익이 {splg_return_1y:.2%}로 플러스입니다.\n"
                     f"{best_asset}에 투자하세요.")
     else:
-        bond_returns = returns_6m[['SHY', 'IEF', 'TLT', 'TIP', 'LQD', 'HYG', 'RWX', 'EMB']].iloc[-1]
-        best_bonds = bond_returns.nlargest(3)
         investment_message = f"SPLG의 최근 1년 수익이 {splg_return_1y:.2%}로 마이너스입니다.\n"
         allocation_message = ""
         total_investment = 0
         
         if investment_amount is not None:
-            for bond, return_ in best_bonds.items():
-                bond_price = close_data[bond].iloc[-1]
-                number_of_shares = int((investment_amount / 3) // bond_price) if bond_price else 0
+            for bond, weight in weights.items():
+                bond_price = last_close[bond]
+                number_of_shares = int((investment_amount * weight) // bond_price) if bond_price else 0
                 total_bond_investment = number_of_shares * bond_price
-                allocation_message += (f"{bond}에 약 {int(investment_amount / 3):,}달러를 투자하면\n"
+                allocation_message += (f"{bond}에 약 {int(investment_amount * weight):,}달러를 투자하면\n"
                                       f"주가 {bond_price:.2f}달러에 {number_of_shares}주를 구매할 수 있으며, \n"
                                       f"총 {total_bond_investment:.2f}달러를 투자하게 됩니다.\n")
                 total_investment += total_bond_investment
@@ -324,7 +512,17 @@ def investment_decision(investment_amount=None):
         
         return investment_message + allocation_message
 
-app.layout = html.Div([
+# 전략 설명 (문장, 들여쓰기 여부) - 대시보드와 정적 번들(prerender.py)이 같이 씀
+STRATEGY_RULES = [
+    ('1. SPLG의 최근 1년 수익 > 0', False),
+    ('    👉🏼 SPLG와 EFA,qqqm중 최근 1년 수익률이 높은 자산 올인.', True),
+    ("2. SPLG의 최근 1년 수익 < 0 ", False),
+    ('    👉🏼 8개 채권( SHY IEF TLT TIP LQD HYG RWX EMB ) 중 최근 6개월 최고 수익 3개 찾기', True),
+    ('    ** 만약 3개 중 최근 6개월 수익이 0보다 작은 종목은 해당 비중만큼 현금 보유!', True),
+    ('3. 한 달에 한 번 확인 및 리밸런싱', False),
+]
+
+main_layout = html.Div([
     html.H1('변형듀얼모멘텀 투자',id='title', style={'margin': '30px', 'textAlign': 'center'}),
     html.H2(id='investment-decision', style={'margin': '30px', 'textAlign': 'center'}),
     html.Div([ dcc.Input(id='investment-amount', type='number', placeholder="총 투자 금액 (달러)", style={'margin': '20px', "padding":"15px", 'fontSize': '15px'}),
@@ -342,8 +540,10 @@ app.layout = html.Div([
    
     html.Div([
         html.H2("최근 1년 ETF 별 수익률 비교" ,id='return-plot-1y-title', style={'margin': '30px', 'textAlign': 'center'}),
+        resolution_selector('resolution-1y'),
         dcc.Graph(id='return-plot-1y', style={'height': '80vh'}),
         html.H2("최근 6개월 ETF 별 수익률 비교" ,id='return-plot-6m-title', style={'margin': '30px', 'textAlign': 'center'}),
+        resolution_selector('resolution-6m'),
         dcc.Graph(id='return-plot-6m', style={'height': '80vh'})
     ], style={'display': 'flex', 'flexDirection': 'column', 'height': 'auto'}),
     html.H2("매수/매도 타이밍 찾기" ,id='return-each-title', style={'margin': '30px', 'textAlign': 'center'}),
@@ -356,6 +556,38 @@ app.layout = html.Div([
               'width': '400px'}
     ),
     dcc.Graph(id='return-each', style={'height': '90vh'}),
+    html.H2("모멘텀 상위 종목 (최근 1년 수익률)" ,id='momentum-ranking-title', style={'margin': '30px', 'textAlign': 'center'}),
+    html.Div(id='momentum-ranking', style={'margin': '10px', 'textAlign': 'center'}),
+    html.H2("기간별 수익률과 과거 시점 판단" ,id='window-returns-title', style={'margin': '30px', 'textAlign': 'center'}),
+    html.Div([
+        dcc.RadioItems(
+            id='lookback-selector',
+            options=[{'label': '1개월', 'value': '1m'},
+                     {'label': '3개월', 'value': '3m'},
+                     {'label': '6개월', 'value': '6m'},
+                     {'label': '12개월', 'value': '12m'},
+                     {'label': '직접 입력', 'value': 'custom'}],
+            value='12m',
+            inline=True,
+            inputStyle={'marginRight': '5px'},
+            labelStyle={'marginRight': '15px'}
+        ),
+        dcc.Input(id='lookback-months', type='number', min=1, step=1, placeholder="개월 수", style={'margin': '10px', 'width': '100px'}),
+        dcc.DatePickerSingle(id='as-of-date', placeholder="기준일 (비우면 최신)", display_format='YYYY-MM-DD', clearable=True, style={'margin': '10px'}),
+    ], style={'display': 'flex', 'flexWrap': 'wrap', "justifyContent": "center", 'alignItems': 'center'}),
+    html.H3(id='as-of-decision', style={'margin': '20px', 'textAlign': 'center', 'whiteSpace': 'pre-line'}),
+    html.Div(id='window-returns', style={'margin': '10px', 'textAlign': 'center'}),
+    html.H2("전략 백테스트 (월간 리밸런싱)" ,id='backtest-title', style={'margin': '30px', 'textAlign': 'center'}),
+    dcc.Graph(id='backtest-plot', style={'height': '70vh'}),
+    html.Div(id='backtest-summary', style={'margin': '10px', 'textAlign': 'center'}),
+    html.H2("위험 지표 (변동성 / 샤프 지수 / 낙폭 / 상관계수)" ,id='risk-title', style={'margin': '30px', 'textAlign': 'center'}),
+    html.Div(id='risk-summary', style={'margin': '10px', 'textAlign': 'center'}),
+    dcc.Graph(id='correlation-heatmap', style={'height': '80vh'}),
+    html.H2(f"앞으로 {SIMULATION_YEARS}년 결과 분포 (몬테카를로 시뮬레이션)" ,id='simulation-title', style={'margin': '30px', 'textAlign': 'center'}),
+    html.Div(id='simulation-summary', style={'margin': '10px', 'textAlign': 'center'}),
+    dcc.Graph(id='simulation-plot', style={'height': '70vh'}),
+    dcc.Graph(id='simulation-drawdown', style={'height': '50vh'}),
+    dcc.Interval(id='simulation-interval', interval=1000, disabled=True),
     html.H2("전략 및 ETF에 대한 간략한 설명" ,id='explain-each-title', style={'margin': '50px', 'textAlign': 'center'}),
 
     html.Div(
@@ -371,9 +603,8 @@ app.layout = html.Div([
         children=[
             html.Div(
                 children=[
-                    html.P('1. SPLG의 최근 1년 수익 > 0'),
-                    html.P('    👉🏼 SPLG와 EFA,qqqm중 최근 1년 수익률이 높은 자산 올인.', style={'marginLeft':'15px'}),
-                    html.P("2. SPLG의 최근 1년 수익 < 0 "),html.P('    👉🏼 8개 채권( SHY IEF TLT TIP LQD HYG RWX EMB ) 중 최근 6개월 최고 수익 3개 찾기', style={'marginLeft':'15px'}),html.P('    ** 만약 3개 중 최근 6개월 수익이 0보다 작은 종목은 해당 비중만큼 현금 보유!', style={'marginLeft':'15px'}),html.P('3. 한 달에 한 번 확인 및 리밸런싱'), 
+                    html.P(text, style={'marginLeft':'15px'}) if indented else html.P(text)
+                    for text, indented in STRATEGY_RULES
                 ],
                 style={
                     'width': '700px',
@@ -407,66 +638,487 @@ app.layout = html.Div([
                     'borderRadius': '5px',
                     'padding': '10px'
                 }
-            ) for asset, description in assets.items()
+            ) for asset, description in described_assets
         ]
     ),
+    html.P(id='snapshot-info', style={'fontSize':'13px', 'color': 'gray'}),
+    dcc.Store(id='market-data'),
+    dcc.Store(id='market-data-version'),
+    # 서버 콜백은 그림 대신 /figures 주소만 보내고, 브라우저가 그 주소에서 캐시된 JSON 바이트를 받음
+    *[dcc.Store(id=f'{graph}-url') for graph in FIGURE_GRAPHS],
+    dcc.Interval(id='market-data-interval', interval=MARKET_DATA_POLL_MS),
+    dcc.Interval(id='live-interval', interval=LIVE_POLL_MS, disabled=live_session is None),
+    dcc.Store(id='live-last-tick'),
     html.P(' **투자의 모든 책임은 본인에게 있습니다. 해당 자료는 정확성 및 신뢰도를 보장할 수 없습니다. 참고용으로만 활용하시기 바랍니다.', style={'fontSize':'13px', 'color': 'gray'})
     
 ])
 
 
-@app.callback(
-    Output('return-each', 'figure'),
-    Input('asset-selector', 'value')
-)
+# 첫 스냅샷이 준비되기 전에 보여줄 화면 (1초마다 확인하고 준비되면 새로고침)
+def loading_layout():
+    return html.Div([
+        html.H1('변형듀얼모멘텀 투자', style={'margin': '30px', 'textAlign': 'center'}),
+        html.H2('시장 데이터를 불러오는 중입니다. 잠시만 기다려주세요.', style={'margin': '30px', 'textAlign': 'center'}),
+        dcc.Location(id='loading-location', refresh=True),
+        dcc.Interval(id='loading-interval', interval=1000),
+    ])
+
+
+# 페이지를 열 때마다 호출: 스냅샷이 있으면 (지난 데이터라도) 바로 본 화면
+def serve_layout():
+    return main_layout if snapshots.latest is not None else loading_layout()
+
+
+# 브라우저에서 그림을 만들 수 있도록 스냅샷의 수익률 / MACD / RSI를 typed array로 묶음
+def build_market_data(snapshot):
+    sample = create_return_plot(select_plot_assets(snapshot.returns_1y), 'year')
+    returns = {}
+    for period in ('year', '6month'):
+        returns[period] = {}
+        for resolution in ('daily', 'weekly', 'monthly'):
+            frame = get_returns_by_period(snapshot, period, resolution)[[trace.name for trace in sample.data]]
+            returns[period][resolution] = {
+                'x': encode_dates(frame.index),
+                'y': {asset: encode_array(frame[asset]) for asset in frame.columns},
+            }
+
+    each_returns = snapshot.returns_1y
+    start = each_returns.index[0]
+    indicators = snapshot.indicators
+    each = {
+        'x': encode_dates(each_returns.index),
+        'returns': {asset: encode_array(each_returns[asset]) for asset in each_returns.columns},
+        'macd_osc': {asset: encode_array(indicators.series('macd_osc', asset).loc[start:])
+                     for asset in each_returns.columns},
+        'rsi': {asset: encode_array(indicators.series('rsi', asset).loc[start:]) for asset in each_returns.columns},
+    }
+
+    layouts = {
+        'returns': sample.to_plotly_json()['layout'],
+        'each': create_return_each(each_returns, '', indicators).to_plotly_json()['layout'],
+    }
+    for layout in layouts.values():
+        layout.setdefault('xaxis', {})['type'] = 'date'
+    return {
+        'version': snapshot.version,
+        'assets': [trace.name for trace in sample.data],
+        'returns': returns,
+        'each': each,
+        'layouts': layouts,
+    }
+
+
+# 그림 종류별 go.Figure 생성 (콜백 / JSON 라우트 / 정적 번들(prerender.py)이 같이 씀)
+def render_figure(snapshot, kind, period=None, asset=None, resolution=None):
+    if kind == 'returns':
+        return create_return_plot(select_plot_assets(get_returns_by_period(snapshot, period, resolution)), period)
+    if kind == 'each':
+        if asset:
+            return create_return_each(snapshot.returns_1y, f'{asset} 1년 수익률과 MACD/RSI', snapshot.indicators,
+                                      selected_asset=asset)
+        return create_return_each(snapshot.returns_1y, '종목을 선택해주세요!', snapshot.indicators)
+    if kind == 'backtest':
+        return create_backtest_plot(snapshot.backtest)
+    if kind == 'risk':
+        risk = snapshot.risk
+        return create_correlation_heatmap(risk.correlation_frame(trace_assets(snapshot, 'year', 'daily')),
+                                          risk.window)
+    if kind in ('simulation', 'simulation-drawdown') and snapshot.simulation_pending:
+        return create_simulation_pending()
+    if kind == 'simulation':
+        return create_simulation_plot(snapshot.simulation)
+    if kind == 'simulation-drawdown':
+        return create_drawdown_distribution(snapshot.simulation)
+    raise KeyError(kind)
+
+
+# 그림 종류별로 만들되 (종류, 기간, 해상도, 종목, 스냅샷 버전)이 같으면 캐시된 그림을 돌려줌
+def cached_figure(kind, period=None, asset=None, snapshot=None, resolution=None):
+    snapshot = snapshot or snapshots.current
+
+    def build():
+        with metrics.FIGURE_BUILD_SECONDS.time(kind=kind):
+            fig = render_figure(snapshot, kind, period=period, asset=asset, resolution=resolution)
+        # 압축 모드: typed array + 긴 시계열 LTTB 다운샘플링
+        # 실시간 모드의 수익률 그래프는 extendData로 점을 붙여야 하므로 일반 배열로 보냄
+        if COMPACT_FIGURES:
+            return compact_figure(fig, typed=not (live_session and kind == 'returns'))
+        return fig
+
+    return figure_cache.get_or_build((kind, period, resolution, asset, snapshot.version), build)
+
+
+# 캐시된 그림 바이트를 받을 /figures 주소 (스냅샷 버전을 붙여서 새 스냅샷이면 주소도 바뀜)
+def figure_url(kind, snapshot, **params):
+    query = {name: value for name, value in params.items() if value is not None}
+    query['v'] = snapshot.version
+    return f"{dash.get_relative_path(f'/figures/{kind}')}?{urlencode(query)}"
+
+
+# 콜백: 스냅샷이 바뀌었을 때만 브라우저로 데이터를 다시 보냄
+def update_market_data(n_intervals, version):
+    snapshot = snapshots.current
+    if version == snapshot.version:
+        return dash.no_update, dash.no_update
+    def build():
+        with metrics.FIGURE_BUILD_SECONDS.time(kind='market-data'):
+            return build_market_data(snapshot)
+
+    entry = figure_cache.get_or_build(('market-data', None, None, None, snapshot.version), build)
+    return entry.figure, snapshot.version
+
+
+# 콜백: 종목 선택 그래프 업데이트
 def update_graph(selected_asset):
-    if selected_asset:
-        return create_return_each(returns_1y, f'{selected_asset} 1년 수익률과 MACD/RSI', selected_asset=selected_asset)
-    else:
-        return create_return_each(returns_1y, '종목을 선택해주세요!')
+    return figure_url('each', snapshots.current, asset=selected_asset or None)
 
 
 # 콜백: 투자 전략 업데이트
-@app.callback(
-    Output('investment-decision', 'children'),
-    Input('calculate-button', 'n_clicks'),
-    Input('reset-button', 'n_clicks'),
-    State('investment-amount', 'value')
-)
 def update_investment_decision(calculate_clicks, reset_clicks, investment_amount):
     ctx = dash.callback_context
+    snapshot = snapshots.current
 
     if not ctx.triggered:
-        return investment_decision(None), ""
+        return investment_decision(None, snapshot), ""
 
     triggered = ctx.triggered[0]['prop_id'].split('.')[0]
 
     if triggered == 'reset-button':
         # SPLG의 수익률에 따라 메시지를 업데이트
-        return investment_decision(None), ""
+        return investment_decision(None, snapshot), ""
 
     if triggered == 'calculate-button':
         # 투자 결정 함수 호출
-        decision_message = investment_decision(investment_amount)
+        decision_message = investment_decision(investment_amount, snapshot)
         return decision_message, ""
 
 # 콜백: 1년 수익률 그래프 업데이트
-@app.callback(
-    Output('return-plot-1y', 'figure'),
-    Input('return-plot-1y', 'id')  # Dummy input to trigger callback
-)
-def update_graph_1y(id_value):
-    return create_return_plot(returns_1y, "year")
+def update_graph_1y(resolution):
+    return figure_url('returns', snapshots.current, period='year', resolution=resolution or 'daily')
 
 # 콜백: 6개월 수익률 그래프 업데이트
-@app.callback(
-    Output('return-plot-6m', 'figure'),
-    Input('return-plot-6m', 'id')  # Dummy input to trigger callback
-)
-def update_graph_6m(id_value):
-    return create_return_plot(returns_6m, "6month")
-
-# 서버 실행
+def update_graph_6m(resolution):
+    return figure_url('returns', snapshots.current, period='6month', resolution=resolution or 'daily')
+
+
+# 콜백: 로딩 화면에서 첫 스냅샷이 준비되면 페이지 새로고침
+def reload_when_ready(n_intervals):
+    if snapshots.latest is None:
+        return dash.no_update
+    return dash.get_relative_path('/')
+
+
+# 콜백: 백테스트 그래프와 요약 업데이트
+def update_backtest(id_value):
+    snapshot = snapshots.current
+    return figure_url('backtest', snapshot), create_backtest_summary(snapshot.backtest)
+
+# 콜백: 위험 지표 표와 상관계수 히트맵 (그래프에 그리는 종목만, 값은 스냅샷에 미리 계산됨)
+def update_risk(id_value):
+    snapshot = snapshots.current
+    risk = snapshot.risk
+    table = create_risk_table(risk.latest(trace_assets(snapshot, 'year', 'daily')), risk.window)
+    return figure_url('risk', snapshot), table
+
+# 콜백: 몬테카를로 시뮬레이션 분포 그래프와 백분위 표 (값은 스냅샷에 미리 계산됨)
+# 시작 스냅샷이라 아직 계산 중이면 1초마다 다시 확인하고, 다 되면 그리고 확인을 멈춤
+def update_simulation(n_intervals):
+    snapshot = snapshots.current
+    pending = snapshot.simulation_pending
+    if pending and n_intervals:
+        return dash.no_update, dash.no_update, dash.no_update, False
+    return (figure_url('simulation', snapshot),
+            figure_url('simulation-drawdown', snapshot),
+            create_simulation_summary(snapshot.simulation),
+            not pending)
+
+# 콜백: 유니버스 전체 모멘텀 상위 종목 표
+def update_momentum_ranking(id_value):
+    log_prices = snapshots.current.log_prices
+    scores = log_prices.trailing_returns(252)
+    return momentum_table([(log_prices.columns[i], float(scores[i])) for i in top_k(scores, MOMENTUM_TOP_K)])
+
+
+def momentum_table(ranking):
+    rows = [
+        html.Tr([
+            html.Td(rank, style={'padding': '2px 10px'}),
+            html.Td(asset, style={'padding': '2px 10px'}),
+            html.Td(f'{score:.2%}', style={'padding': '2px 10px'}),
+        ]) for rank, (asset, score) in enumerate(ranking, start=1)
+    ]
+    return html.Table([html.Tr([html.Th('순위'), html.Th('종목'), html.Th('수익률')])] + rows,
+                      style={'margin': '0 auto', 'fontSize': '14px'})
+
+# 수익률 그래프의 trace 순서 (스냅샷, 기간, 해상도마다 한 번만 계산)
+# 스냅샷 버전이 바뀔 때만 비우고, 여러 요청 스레드가 같이 쓰므로 잠금 안에서 읽고 씀
+_trace_lock = threading.Lock()
+_trace_assets = {'version': None, 'entries': {}}
+
+
+def trace_assets(snapshot, period, resolution):
+    if CLIENTSIDE_SWITCHING:
+        # 브라우저 모드는 build_market_data와 같이 1년 일봉 기준으로 고른 종목을 모든 그래프에 씀
+        period, resolution = 'year', 'daily'
+    with _trace_lock:
+        if _trace_assets['version'] != snapshot.version:
+            _trace_assets.update(version=snapshot.version, entries={})
+        entries = _trace_assets['entries']
+        if (period, resolution) not in entries:
+            columns = select_plot_assets(get_returns_by_period(snapshot, period, resolution)).columns
+            entries[period, resolution] = plot_order(columns)
+        return entries[period, resolution]
+
+
+# 수익률 그래프 extendData: 실시간 수익률을 trace마다 점 하나씩 이어 붙임
+def live_extend(tick, returns, trace_names):
+    values = returns.iloc[0]
+    y = [[float(value) if pd.notna(value) else None] for value in values[trace_names]]
+    return {'x': [[tick.milliseconds]] * len(trace_names), 'y': y}, list(range(len(trace_names)))
+
+
+# 콜백: 장중 실시간 시세 반영 (자산 수만큼만 계산, 그림은 다시 만들지 않고 점만 추가)
+def update_live(n_intervals, investment_amount, resolution_1y, resolution_6m, last_tick):
+    snapshot = snapshots.current
+    tick = live_session.tick(snapshot)
+    if tick is None or tick.milliseconds == last_tick:
+        return dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
+    decision = f"[실시간 {tick.time:%H:%M}] " + investment_decision(investment_amount, tick)
+    return (
+        decision,
+        live_extend(tick, tick.returns_1y, trace_assets(snapshot, 'year', resolution_1y or 'daily')),
+        live_extend(tick, tick.returns_6m, trace_assets(snapshot, '6month', resolution_6m or 'daily')),
+        momentum_table(tick.ranking),
+        tick.milliseconds,
+    )
+
+
+# 콜백: 기준일 선택 범위를 스냅샷 기간으로 설정
+def update_as_of_range(id_value):
+    log_prices = snapshots.current.log_prices
+    return log_prices.first_date.date(), log_prices.last_date.date(), log_prices.last_date.date()
+
+
+# 콜백: 선택한 기간 / 기준일의 수익률 순위와 그날 기준 전략 판단 (누적 로그 가격 두 줄 차이로 계산)
+def update_window_returns(lookback, custom_months, as_of_date):
+    months = custom_months if lookback == 'custom' else LOOKBACK_MONTHS.get(lookback)
+    if not months or months <= 0:
+        return dash.no_update, dash.no_update
+    log_prices = snapshots.current.log_prices
+    returns = log_prices.lookback_returns(int(months), as_of_date)
+    ranking = [(log_prices.columns[i], float(returns[i])) for i in top_k(returns, MOMENTUM_TOP_K)]
+    point = log_prices.point_in_time(as_of_date)
+    decision = f"{point.as_of:%Y-%m-%d} 기준\n" + investment_decision(None, point)
+    return decision, momentum_table(ranking)
+
+
+# 콜백: 데이터 기준일 / 스냅샷 버전 표시
+def update_snapshot_info(id_value):
+    info = snapshots.current.info()
+    return f"데이터 기준일 {info['as_of']} · 스냅샷 v{info['version']} ({info['created_at']})"
+
+
+# 첫 스냅샷이 아직 없으면 503 + Retry-After (기다리지 않고 바로 응답)
+def ready_snapshot():
+    snapshot = snapshots.latest
+    if snapshot is None:
+        response = jsonify(error='시장 데이터를 불러오는 중입니다.')
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        abort(response)
+    return snapshot
+
+
+# 현재 스냅샷 버전과 생성 시각 조회
+def snapshot_info():
+    return jsonify(ready_snapshot().info())
+
+
+# 여러 계좌의 매수 수량 일괄 계산
+#   POST /api/allocations {"accounts": [{"account_id": "A1", "amount": 10000, "constraints": {"cash_reserve": 500}}]}
+def allocations_api():
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify(error='JSON 본문이 필요합니다.'), 400
+    try:
+        return jsonify(allocate(ready_snapshot(), body.get('accounts')))
+    except AllocationError as error:
+        return jsonify(error=str(error)), 400
+
+
+# 캐시된 그림 JSON 조회 (ETag / gzip / brotli 지원)
+#   /figures/returns?period=year|6month&resolution=daily|weekly|monthly, /figures/each?asset=SPLG, /figures/backtest,
+#   /figures/risk, /figures/simulation, /figures/simulation-drawdown
+def figure_json(kind):
+    period = request.args.get('period')
+    asset = request.args.get('asset')
+    resolution = request.args.get('resolution', 'daily')
+    if kind == 'returns' and (period not in ('year', '6month') or resolution not in ('daily', 'weekly', 'monthly')):
+        abort(404)
+    if kind == 'each' and asset is not None and asset not in assets:
+        abort(404)
+    if kind not in ('returns', 'each', 'backtest', 'risk', 'simulation', 'simulation-drawdown'):
+        abort(404)
+    ready_snapshot()
+    if kind == 'returns':
+        return figure_response(cached_figure(kind, period=period, resolution=resolution))
+    return figure_response(cached_figure(kind, asset=asset if kind == 'each' else None))
+
+def register_callbacks(app):
+    app.callback(Output('loading-location', 'href'), Input('loading-interval', 'n_intervals'))(reload_when_ready)
+    app.callback(
+        Output('investment-decision', 'children'),
+        Input('calculate-button', 'n_clicks'),
+        Input('reset-button', 'n_clicks'),
+        State('investment-amount', 'value')
+    )(update_investment_decision)
+
+    # 종목/해상도 전환 콜백 등록 (브라우저 모드면 clientside, 아니면 서버 콜백)
+    if CLIENTSIDE_SWITCHING:
+        app.callback(
+            Output('market-data', 'data'),
+            Output('market-data-version', 'data'),
+            Input('market-data-interval', 'n_intervals'),
+            State('market-data-version', 'data')
+        )(update_market_data)
+        app.clientside_callback(
+            ClientsideFunction(namespace='dualmomentum', function_name='returnEach'),
+            Output('return-each', 'figure'),
+            Input('asset-selector', 'value'),
+            Input('market-data', 'data')
+        )
+        app.clientside_callback(
+            ClientsideFunction(namespace='dualmomentum', function_name='returnPlot1y'),
+            Output('return-plot-1y', 'figure'),
+            Input('resolution-1y', 'value'),
+            Input('market-data', 'data')
+        )
+        app.clientside_callback(
+            ClientsideFunction(namespace='dualmomentum', function_name='returnPlot6m'),
+            Output('return-plot-6m', 'figure'),
+            Input('resolution-6m', 'value'),
+            Input('market-data', 'data')
+        )
+    else:
+        app.callback(Output('return-each-url', 'data'), Input('asset-selector', 'value'))(update_graph)
+        app.callback(Output('return-plot-1y-url', 'data'), Input('resolution-1y', 'value'))(update_graph_1y)
+        app.callback(Output('return-plot-6m-url', 'data'), Input('resolution-6m', 'value'))(update_graph_6m)
+
+    # 서버가 정한 /figures 주소의 그림을 브라우저가 직접 받음 (ETag / 압축 / 브라우저 캐시를 그대로 씀)
+    for graph in FIGURE_GRAPHS:
+        app.clientside_callback(
+            ClientsideFunction(namespace='dualmomentum', function_name='fetchFigure'),
+            Output(graph, 'figure'),
+            Input(f'{graph}-url', 'data')
+        )
+
+    app.callback(
+        Output('backtest-plot-url', 'data'),
+        Output('backtest-summary', 'children'),
+        Input('backtest-plot', 'id')  # Dummy input to trigger callback
+    )(update_backtest)
+    app.callback(
+        Output('correlation-heatmap-url', 'data'),
+        Output('risk-summary', 'children'),
+        Input('correlation-heatmap', 'id')  # Dummy input to trigger callback
+    )(update_risk)
+    app.callback(
+        Output('simulation-plot-url', 'data'),
+        Output('simulation-drawdown-url', 'data'),
+        Output('simulation-summary', 'children'),
+        Output('simulation-interval', 'disabled'),
+        Input('simulation-interval', 'n_intervals')
+    )(update_simulation)
+    app.callback(
+        Output('momentum-ranking', 'children'),
+        Input('momentum-ranking', 'id')  # Dummy input to trigger callback
+    )(update_momentum_ranking)
+    app.callback(
+        Output('snapshot-info', 'children'),
+        Input('snapshot-info', 'id')  # Dummy input to trigger callback
+    )(update_snapshot_info)
+    app.callback(
+        Output('as-of-date', 'min_date_allowed'),
+        Output('as-of-date', 'max_date_allowed'),
+        Output('as-of-date', 'initial_visible_month'),
+        Input('as-of-date', 'id')  # Dummy input to trigger callback
+    )(update_as_of_range)
+    app.callback(
+        Output('as-of-decision', 'children'),
+        Output('window-returns', 'children'),
+        Input('lookback-selector', 'value'),
+        Input('lookback-months', 'value'),
+        Input('as-of-date', 'date')
+    )(update_window_returns)
+    if live_session is not None:
+        app.callback(
+            Output('investment-decision', 'children', allow_duplicate=True),
+            Output('return-plot-1y', 'extendData'),
+            Output('return-plot-6m', 'extendData'),
+            Output('momentum-ranking', 'children', allow_duplicate=True),
+            Output('live-last-tick', 'data'),
+            Input('live-interval', 'n_intervals'),
+            State('investment-amount', 'value'),
+            State('resolution-1y', 'value'),
+            State('resolution-6m', 'value'),
+            State('live-last-tick', 'data'),
+            prevent_initial_call=True
+        )(update_live)
+
+
+def register_routes(server):
+    server.add_url_rule('/snapshot', view_func=snapshot_info)
+    server.add_url_rule('/api/allocations', view_func=allocations_api, methods=['POST'])
+    server.add_url_rule('/figures/<kind>', view_func=figure_json)
+
+
+# 앱 팩토리: Flask/Dash를 만들고 바로 돌려줌 (네트워크를 기다리지 않음)
+# 디스크에 저장된 마지막 데이터로 스냅샷을 만들어 바로 서비스하고, 새 데이터는 백그라운드에서 받음
+# 저장된 데이터가 없으면 첫 갱신이 끝날 때까지 로딩 화면 / 503
+# snapshot_source: 다중 프로세스 워커는 직접 받지 않고 공유 스냅샷에 붙는 SharedSnapshotReader를 넘김
+def create_app(snapshot_source=None):
+    global snapshots
+    if snapshot_source is not None:
+        snapshots = snapshot_source
+
+    server = Flask(__name__)
+    app = Dash(__name__, server=server, assets_folder="assets", suppress_callback_exceptions=True)
+    app.layout = serve_layout
+    register_callbacks(app)
+    register_routes(server)
+    install_compression(server)
+    # 콜백/요청 지연시간, 캐시 적중, 스냅샷 나이를 /metrics(Prometheus 텍스트)로 노출
+    # PROFILE_SLOW_MS를 주면 그보다 느린 요청의 스택 샘플을 PROFILE_DIR에 저장
+    metrics.install(server, app)
+    metrics.watch_snapshots(snapshots, figure_cache)
+
+    snapshots.load_persisted()
+    snapshots.start(refresh_now=True)
+    return app
+
+
+# `app:server`, `from app import app`처럼 인스턴스를 찾으면 그때 한 번 만듦
+_instance = None
+
+
+def __getattr__(name):
+    global _instance
+    if name not in ('app', 'server'):
+        raise AttributeError(name)
+    if _instance is None:
+        _instance = create_app()
+    return _instance if name == 'app' else _instance.server
+
+
+# 서버 실행 (WEB_CONCURRENCY > 1이면 코디네이터 1개 + 워커 프로세스 여러 개)
 if __name__ == '__main__':
-    from waitress import serve
-    serve(app.server, host='0.0.0.0', port=8000)
\ No newline at end of file
+    import serving
+    from shared_snapshot import PublishingRefresher, SharedSnapshotReader
+
+    if serving.WEB_CONCURRENCY > 1:
+        serving.serve_workers(lambda: create_app(SharedSnapshotReader()).server,
+                              lambda: PublishingRefresher(store, assets.keys()),
+                              lambda: create_app().server,
+                              host='0.0.0.0', port=8000, workers=serving.WEB_CONCURRENCY)
+    else:
+        serving.serve(create_app().server, host='0.0.0.0', port=8000)
\ No newline at end of file
@@ -0,0 +1,78 @@
+// 스냅샷 데이터(dcc.Store 'market-data')로 브라우저에서 바로 그림을 만드는 clientside 콜백
+// 수익률 그래프 배열은 서버가 보낸 typed array({dtype, bdata})를 Float32Array/Float64Array로 풀어서 넘김
+// (실시간 모드의 extendData는 {dtype, bdata} 형식에는 점을 붙일 수 없음)
+var TYPED_ARRAYS = {f4: Float32Array, f8: Float64Array};
+
+function decodeTypedArray(spec) {
+    var binary = atob(spec.bdata);
+    var bytes = new Uint8Array(binary.length);
+    for (var i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+    }
+    return new TYPED_ARRAYS[spec.dtype](bytes.buffer);
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    dualmomentum: {
+        returnPlot1y: function (resolution, data) {
+            return window.dash_clientside.dualmomentum.returnPlot(resolution, data, 'year');
+        },
+
+        returnPlot6m: function (resolution, data) {
+            return window.dash_clientside.dualmomentum.returnPlot(resolution, data, '6month');
+        },
+
+        // 1년/6개월 수익률 그래프 (일봉/주봉/월봉 전환)
+        returnPlot: function (resolution, data, period) {
+            if (!data) {
+                return window.dash_clientside.no_update;
+            }
+            var series = data.returns[period][resolution || 'daily'];
+            var traces = data.assets.map(function (asset) {
+                return {
+                    type: 'scatter',
+                    mode: 'lines',
+                    name: asset,
+                    x: decodeTypedArray(series.x),
+                    y: decodeTypedArray(series.y[asset])
+                };
+            });
+            return {data: traces, layout: data.layouts.returns};
+        },
+
+        // 서버 콜백이 정한 /figures 주소에서 캐시된 그림 JSON을 받음 (ETag / 압축 / 브라우저 캐시 사용)
+        fetchFigure: function (url) {
+            if (!url) {
+                return window.dash_clientside.no_update;
+            }
+            return fetch(url).then(function (response) {
+                if (!response.ok) {
+                    throw new Error(url + ': ' + response.status);
+                }
+                return response.json();
+            });
+        },
+
+        // 종목 하나의 1년 수익률 + MACD OSC + RSI 그래프
+        returnEach: function (asset, data) {
+            if (!data) {
+                return window.dash_clientside.no_update;
+            }
+            var selected = asset || 'SPLG';
+            var each = data.each;
+            var layout = Object.assign({}, data.layouts.each, {
+                title: {text: asset ? asset + ' 1년 수익률과 MACD/RSI' : '종목을 선택해주세요!'}
+            });
+            return {
+                data: [
+                    {type: 'scatter', mode: 'lines', name: selected, x: each.x, y: each.returns[selected]},
+                    {type: 'scatter', mode: 'lines', name: selected + ' MACD OSC', x: each.x,
+                     y: each.macd_osc[selected], yaxis: 'y2'},
+                    {type: 'scatter', mode: 'lines', name: selected + ' RSI', x: each.x,
+                     y: each.rsi[selected], yaxis: 'y3'}
+                ],
+                layout: layout
+            };
+        }
+    }
+});
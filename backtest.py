@@ -0,0 +1,173 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+# 변형 듀얼모멘텀 기본 자산군
+BENCHMARK_ASSET = 'SPLG'
+OFFENSIVE_ASSETS = ('SPLG', 'QQQM', 'EFA')
+DEFENSIVE_ASSETS = ('SHY', 'IEF', 'TLT', 'TIP', 'LQD', 'HYG', 'RWX', 'EMB')
+
+# 전략에 쓰는 자산 (기준자산은 공격자산에 포함)
+STRATEGY_ASSETS = tuple(dict.fromkeys(OFFENSIVE_ASSETS + DEFENSIVE_ASSETS))
+
+
+@dataclass(frozen=True)
+class BacktestResult:
+    equity: pd.Series         # 첫 리밸런싱일을 1로 둔 일별 평가금액
+    holdings: pd.DataFrame    # 리밸런싱일별 비중 (CASH 열 포함)
+    turnover: pd.Series       # 리밸런싱일별 회전율 (0.5 * 비중 변화 절댓값 합)
+    cagr: float
+    max_drawdown: float
+    sharpe: float
+    volatility: float
+
+    def summary(self):
+        return {
+            'start': self.equity.index[0].strftime('%Y-%m-%d'),
+            'end': self.equity.index[-1].strftime('%Y-%m-%d'),
+            'cagr': self.cagr,
+            'max_drawdown': self.max_drawdown,
+            'sharpe': self.sharpe,
+            'volatility': self.volatility,
+            'avg_turnover': float(self.turnover.mean()) if len(self.turnover) else 0.0,
+        }
+
+
+def period_end_positions(index, freq='ME'):
+    # 각 월(또는 freq 구간)의 마지막 거래일 위치
+    positions = pd.Series(np.arange(len(index)), index=index)
+    return positions.resample(freq).last().dropna().to_numpy(dtype=np.int64)
+
+
+def _lookback_returns(prices, lookback):
+    # 시간 축은 뒤에서 두 번째 (앞에 경로 축이 더 있어도 됨)
+    returns = np.full(prices.shape, np.nan)
+    if lookback < prices.shape[-2]:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns[..., lookback:, :] = prices[..., lookback:, :] / prices[..., :-lookback, :] - 1
+    return returns
+
+
+def _top_n_mask(scores, top_n):
+    # 행마다 점수 상위 top_n 위치를 True로 (전체 정렬 대신 argpartition)
+    top_n = min(top_n, scores.shape[-1])
+    ranked = np.where(np.isnan(scores), -np.inf, scores)
+    picks = np.argpartition(-ranked, top_n - 1, axis=-1)[..., :top_n]
+    mask = np.zeros(scores.shape, dtype=bool)
+    np.put_along_axis(mask, picks, True, axis=-1)
+    return mask
+
+
+# 전략 규칙: 이미 계산된 구간 수익률로 목표 비중을 정함
+#   기준자산 공격 구간 수익 > 0 : 공격자산 중 수익률 1등에 100%
+#   그 외 : 방어자산 중 방어 구간 수익 상위 top_n에 1/top_n씩, 수익이 0 이하인 몫은 현금
+# 기준자산 수익을 계산할 수 없으면 전부 현금
+# offensive_returns는 (... x 전체 자산), defensive_returns는 (... x 방어자산) (앞 축은 월 / 경로, 없어도 됨)
+# 백테스트(dual_momentum_weights), 시뮬레이션, 현재 주문 비중(allocation.target_weights)이 같이 씀
+def momentum_weights(offensive_returns, defensive_returns, columns, benchmark=BENCHMARK_ASSET,
+                     offensive=OFFENSIVE_ASSETS, defensive=DEFENSIVE_ASSETS, top_n=3):
+    columns = list(columns)
+    offensive_idx = np.array([columns.index(asset) for asset in offensive])
+    defensive_idx = np.array([columns.index(asset) for asset in defensive])
+    benchmark_idx = columns.index(benchmark)
+
+    benchmark_returns = offensive_returns[..., benchmark_idx]
+    risk_on = benchmark_returns > 0
+    risk_off = benchmark_returns <= 0  # NaN이면 둘 다 False -> 현금
+
+    scores = offensive_returns[..., offensive_idx]
+    best = offensive_idx[np.argmax(np.where(np.isnan(scores), -np.inf, scores), axis=-1)]
+    weights = np.where(risk_on[..., None] & (np.arange(len(columns)) == best[..., None]), 1.0, 0.0)
+
+    chosen = _top_n_mask(defensive_returns, top_n) & (defensive_returns > 0)
+    defensive_weights = np.where(chosen, 1.0 / min(top_n, len(defensive_idx)), 0.0)
+    weights[..., defensive_idx] += np.where(risk_off[..., None], defensive_weights, 0.0)
+    return weights
+
+
+# 월말 가격 행렬로 매월 목표 비중을 한 번에 계산 (공격 구간 offensive_lookback개월, 방어 구간 defensive_lookback개월)
+# month_prices는 (월 x 자산) 또는 (경로 x 월 x 자산) (simulation.py가 여러 경로를 한 번에 계산)
+def dual_momentum_weights(month_prices, columns, benchmark=BENCHMARK_ASSET, offensive=OFFENSIVE_ASSETS,
+                          defensive=DEFENSIVE_ASSETS, offensive_lookback=12, defensive_lookback=6, top_n=3):
+    columns = list(columns)
+    defensive_idx = np.array([columns.index(asset) for asset in defensive])
+    offensive_returns = _lookback_returns(month_prices, offensive_lookback)
+    defensive_returns = _lookback_returns(month_prices[..., defensive_idx], defensive_lookback)
+    return momentum_weights(offensive_returns, defensive_returns, columns, benchmark=benchmark,
+                            offensive=offensive, defensive=defensive, top_n=top_n)
+
+
+# 일별 가격(날짜 x 자산)으로 월말 리밸런싱을 재생
+# rebalance_months 개월마다 리밸런싱하고, 리밸런싱 사이에는 매수 후 보유(비중 드리프트 반영)
+def run_backtest(close, rebalance_months=1, **rule):
+    close = close.sort_index().ffill()
+    prices = close.to_numpy(dtype=np.float64)
+    month_ends = period_end_positions(close.index)
+    return backtest_prices(close.index, prices, close.columns, month_ends, rebalance_months, **rule)
+
+
+# 이미 준비된 가격 행렬과 월말 위치로 백테스트 (파라미터 스윕에서 가격을 한 번만 준비하기 위함)
+# warmup을 주면 그 달부터 시작 (서로 다른 lookback끼리 같은 기간으로 비교할 때)
+def backtest_prices(index, prices, columns, month_ends, rebalance_months=1, warmup=None, **rule):
+    weights = dual_momentum_weights(prices[month_ends], columns, **rule)
+    # 기준자산 신호가 나오는 첫 달부터 시작
+    first = warmup if warmup is not None else rule.get('offensive_lookback', 12)
+    keep = np.arange(first, len(month_ends), rebalance_months)
+    return simulate_rebalancing(index, prices, columns, month_ends[keep], weights[keep])
+
+
+def simulate_rebalancing(index, prices, columns, rebalance_positions, weights):
+    if len(rebalance_positions) == 0:
+        raise ValueError('백테스트할 기간이 부족합니다.')
+    cash = 1.0 - weights.sum(axis=1)
+    start = rebalance_positions[0]
+    days = np.arange(start, len(prices))
+
+    # 각 날짜가 속한 리밸런싱 구간 (리밸런싱 당일은 직전 구간의 마지막 날)
+    segment = np.searchsorted(rebalance_positions, days, side='left') - 1
+    segment[0] = 0
+    base = prices[rebalance_positions[segment]]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative = np.where(weights[segment] > 0, prices[days] / base, 0.0)
+    growth = (weights[segment] * relative).sum(axis=1) + cash[segment]
+    growth[0] = 1.0
+
+    # 리밸런싱 시점 평가금액 = 이전 구간 마지막 날 성장률의 누적곱
+    segment_end = rebalance_positions[1:] - start
+    segment_values = np.concatenate([[1.0], np.cumprod(growth[segment_end])])
+    equity = segment_values[segment] * growth
+    equity[0] = 1.0
+
+    # 회전율: 직전 구간에서 드리프트된 비중과 새 목표 비중의 차이 (현금 포함)
+    drifted = np.zeros((len(rebalance_positions), weights.shape[1] + 1))
+    drifted[0, -1] = 1.0
+    if len(segment_end):
+        end_relative = relative[segment_end]
+        end_growth = growth[segment_end][:, None]
+        drifted[1:, :-1] = weights[:-1] * end_relative / end_growth
+        drifted[1:, -1] = cash[:-1] / end_growth[:, 0]
+    target = np.column_stack([weights, cash])
+    turnover = 0.5 * np.abs(target - drifted).sum(axis=1)
+
+    dates = index[days]
+    rebalance_dates = index[rebalance_positions]
+    equity = pd.Series(equity, index=dates, name='equity')
+    holdings = pd.DataFrame(target, index=rebalance_dates, columns=list(columns) + ['CASH'])
+    return BacktestResult(equity=equity, holdings=holdings,
+                          turnover=pd.Series(turnover, index=rebalance_dates, name='turnover'),
+                          **performance_stats(equity.to_numpy(), dates))
+
+
+def performance_stats(equity, dates):
+    years = max((dates[-1] - dates[0]).days / 365.25, 1e-9)
+    daily = equity[1:] / equity[:-1] - 1
+    volatility = float(daily.std(ddof=1) * np.sqrt(252)) if len(daily) > 1 else 0.0
+    mean = float(daily.mean() * 252) if len(daily) else 0.0
+    return {
+        'cagr': float(equity[-1] ** (1 / years) - 1),
+        'max_drawdown': float((equity / np.maximum.accumulate(equity) - 1).min()),
+        'sharpe': mean / volatility if volatility else 0.0,
+        'volatility': volatility,
+    }
@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+
+# fetcher.HttpChartProvider를 네트워크 없이 시험하기 위한 로컬 차트 API 대역 서버
+#   GET /v8/finance/chart/<ticker>?period1=..&period2=.. -> 야후 차트 API와 같은 형태의 JSON
+# prices(날짜 x 티커 프레임)에 없는 티커는 404
+#   latency     : 응답마다 기다리는 시간 (초)
+#   fail_first  : 티커마다 처음 몇 번은 503 (재시도 확인용)
+# requests에 요청 수가 티커별로 기록됨
+class ChartServer:
+    def __init__(self, prices, latency=0.0, fail_first=0, host='127.0.0.1', port=0):
+        self.prices = prices
+        self.latency = latency
+        self.fail_first = fail_first
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _handler(self):
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                ticker = url.path.rsplit('/', 1)[-1]
+                with owner._lock:
+                    count = owner.requests[ticker] = owner.requests.get(ticker, 0) + 1
+                if owner.latency:
+                    time.sleep(owner.latency)
+                if ticker not in owner.prices.columns:
+                    return self._send(404, {'chart': {'result': None, 'error': {'code': 'Not Found'}}})
+                if count <= owner.fail_first:
+                    return self._send(503, {'chart': {'result': None, 'error': {'code': 'Unavailable'}}})
+                query = parse_qs(url.query)
+                return self._send(200, owner.chart(ticker, int(query['period1'][0]), int(query['period2'][0])))
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def chart(self, ticker, period1, period2):
+        series = self.prices[ticker].dropna()
+        # 미국 장 시작 시각(UTC 14:30)의 epoch 초를 봉 시각으로 씀
+        times = series.index.tz_localize('UTC') + pd.Timedelta(hours=14, minutes=30)
+        seconds = times.as_unit('s').asi8
+        keep = (seconds >= period1) & (seconds < period2)
+        closes = [float(value) for value in series.to_numpy()[keep]]
+        return {'chart': {'result': [{
+            'meta': {'symbol': ticker, 'exchangeTimezoneName': 'America/New_York'},
+            'timestamp': [int(value) for value in seconds[keep]],
+            'indicators': {'quote': [{'close': closes}], 'adjclose': [{'adjclose': closes}]},
+        }], 'error': None}}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='chart-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == '__main__':
+    # 합성 가격으로 대역 서버만 띄움: PRICE_HTTP_BASE_URL=http://127.0.0.1:8765 python app.py
+    import os
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from benchmarks.fixtures import synthetic_prices
+    from universe import DEFAULT_ASSETS
+
+    server = ChartServer(synthetic_prices(list(DEFAULT_ASSETS), 252 * 20), port=8765)
+    print(f'serving synthetic charts on {server.base_url}')
+    server.start()
+    threading.Event().wait()
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+
+# 네트워크 없이 쓸 수 있는 고정 시드 합성 가격 (기하 브라운 운동)
+# 앱이 오늘 기준으로 1년/6개월 구간을 자르므로 기본 종료일은 오늘
+def synthetic_prices(tickers, days, end=None, seed=0):
+    rng = np.random.default_rng(seed)
+    end = end or pd.Timestamp.today().normalize()
+    index = pd.bdate_range(end=end, periods=days, name='Date')
+    drift = rng.uniform(-0.0002, 0.0006, len(tickers))
+    volatility = rng.uniform(0.003, 0.02, len(tickers))
+    shocks = rng.normal(drift, volatility, (days, len(tickers)))
+    prices = 100 * np.exp(np.cumsum(shocks, axis=0))
+    return pd.DataFrame(prices, index=index, columns=list(tickers))
+
+
+# base 티커 뒤에 SYN00000 형식의 합성 티커를 붙여 count개로 맞춤
+def synthetic_tickers(count, base=()):
+    return list(base) + [f'SYN{i:05d}' for i in range(max(count - len(base), 0))]
+
+
+# PRICE_CSV로 쓸 수 있는 CSV 파일 작성
+def write_fixture_csv(path, tickers, days, end=None, seed=0):
+    synthetic_prices(tickers, days, end=end, seed=seed).to_csv(path)
+    return path
@@ -0,0 +1,358 @@
+import argparse
+import functools
+import gzip
+import itertools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fixtures import synthetic_prices, synthetic_tickers, write_fixture_csv  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+# 기준선보다 이 비율 이상 느려지거나 커지면 회귀로 판단
+DEFAULT_TIME_TOLERANCE = 0.30
+DEFAULT_SIZE_TOLERANCE = 0.05
+# 이보다 작은 시간 차이(ms)는 측정 잡음으로 보고 무시
+DEFAULT_MIN_DELTA_MS = 2.0
+
+# 첫 렌더 추정에 쓰는 느린 모바일 회선 (크롬 개발자 도구 Slow 3G: 400kbps, 왕복 400ms)
+SLOW_LINK_KBPS = 400
+SLOW_LINK_RTT_MS = 400
+
+# 브라우저에서 그림 응답을 받은 뒤 하는 일: JSON.parse 후 typed array(bdata)를 Float32/64Array로 풂
+DECODE_SCRIPT = '''
+const text = require('fs').readFileSync(process.argv[1], 'utf8');
+const decode = (value) => {
+  if (value && typeof value === 'object') {
+    if (typeof value.bdata === 'string') {
+      const bytes = new Uint8Array(Buffer.from(value.bdata, 'base64')).buffer;
+      return value.dtype === 'f8' ? new Float64Array(bytes) : new Float32Array(bytes);
+    }
+    for (const key in value) value[key] = decode(value[key]);
+  }
+  return value;
+};
+let best = Infinity;
+for (let i = 0; i < Number(process.argv[2]); i++) {
+  const start = process.hrtime.bigint();
+  decode(JSON.parse(text));
+  best = Math.min(best, Number(process.hrtime.bigint() - start) / 1e6);
+}
+console.log(best);
+'''
+
+STRATEGY_TICKERS = ['SPLG', 'QQQM', 'EFA', 'SHY', 'IEF', 'TLT', 'TIP', 'LQD', 'HYG', 'RWX', 'EMB']
+
+
+# 반복 중 가장 빠른 값 (공유 머신의 잡음 영향을 줄이기 위해 중앙값 대신 최솟값)
+def _best_ms(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return min(samples)
+
+
+# 프로세스 시작부터 첫 응답(/_dash-layout 200)까지 시간: 빈 저장소(cold)와 채워진 저장소(warm)를 별도 프로세스로 측정
+def bench_startup(env, workdir, repeat):
+    code = ('import time; t = time.perf_counter(); import app; '
+            'assert app.create_app().server.test_client().get("/_dash-layout").status_code == 200; '
+            'print(time.perf_counter() - t)')
+
+    def import_ms(run_env):
+        output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=run_env, check=True,
+                                capture_output=True, text=True).stdout
+        return float(output.strip().splitlines()[-1]) * 1000
+
+    cold = import_ms(dict(env, PRICE_STORE_DIR=os.path.join(workdir, 'cold-store')))
+    import_ms(env)  # 저장소 채우기
+    warm = min(import_ms(env) for _ in range(repeat))
+    return {'startup.first_response_cold_ms': cold, 'startup.first_response_warm_ms': warm}
+
+
+# 앱을 만들고 시작 스냅샷의 시뮬레이션을 백그라운드 갱신이 채울 때까지 기다림
+# (갱신과 겹치면 콜백 시간에 시뮬레이션 계산이 섞임)
+def _wait_complete(app_module, timeout=300):
+    app_module.server  # create_app()
+    deadline = time.monotonic() + timeout
+    while app_module.snapshots.current.simulation_pending:
+        if time.monotonic() > deadline:
+            raise RuntimeError('시작 스냅샷의 시뮬레이션이 채워지지 않았습니다')
+        time.sleep(0.05)
+
+
+def _dash_request(client, output, inputs, state=()):
+    body = {
+        'output': output,
+        'outputs': {'id': output.split('.')[0], 'property': output.split('.')[1]},
+        'inputs': [{'id': i, 'property': p, 'value': v} for i, p, v in inputs],
+        'state': [{'id': i, 'property': p, 'value': v} for i, p, v in state],
+        'changedPropIds': [f'{i}.{p}' for i, p, _ in inputs],
+    }
+    response = client.post('/_dash-update-component', json=body)
+    assert response.status_code in (200, 204), response.status_code
+    body = response.get_data()
+    if output.endswith('-url.data'):
+        # 그림 콜백은 /figures 주소만 주므로 브라우저처럼 그 주소의 그림까지 받음
+        figure = client.get(response.get_json()['response'][output.split('.')[0]]['data'])
+        assert figure.status_code == 200, figure.status_code
+        body += figure.get_data()
+    return body
+
+
+# Dash 콜백 지연 (HTTP 요청 전체 경로, 첫 호출=cold / 반복 호출 최솟값=warm)
+def bench_callbacks(app_module, repeat):
+    client = app_module.server.test_client()
+    cases = {
+        'update_graph': ('return-each-url.data', [('asset-selector', 'value', 'QQQM')], ()),
+        'update_investment_decision': ('investment-decision.children',
+                                       [('calculate-button', 'n_clicks', 1), ('reset-button', 'n_clicks', 0)],
+                                       [('investment-amount', 'value', 10000)]),
+        'update_graph_1y': ('return-plot-1y-url.data', [('resolution-1y', 'value', 'daily')], ()),
+        'update_graph_6m': ('return-plot-6m-url.data', [('resolution-6m', 'value', 'daily')], ()),
+    }
+    results = {}
+    for name, (output, inputs, state) in cases.items():
+        start = time.perf_counter()
+        body = _dash_request(client, output, inputs, state)
+        results[f'callback.{name}_cold_ms'] = (time.perf_counter() - start) * 1000
+        results[f'callback.{name}_warm_ms'] = _best_ms(lambda: _dash_request(client, output, inputs, state), repeat)
+        results[f'payload.{name}_bytes'] = len(body)
+    return results
+
+
+# 1년 수익률 / 백테스트(20년 일별) 그림의 첫 렌더까지 걸리는 시간 추정 (일반 JSON vs 압축 그림)
+#   server   : 그림 생성 + 직렬화
+#   transfer : gzip 크기를 느린 회선(SLOW_LINK_*)으로 받는 시간
+#   decode   : node로 잰 JSON.parse + typed array 풀기 (node가 없으면 빠짐)
+#   total    : 세 값의 합. plotly.js가 그리는 시간은 브라우저가 있어야 하므로 포함하지 않음
+def bench_first_render(app_module, workdir, repeat):
+    from payload import compact_figure
+
+    snapshot = app_module.snapshots.current
+    node = shutil.which('node')
+    figures = {
+        'returns_1y': lambda: app_module.render_figure(snapshot, 'returns', period='year', resolution='daily'),
+        'backtest': lambda: app_module.render_figure(snapshot, 'backtest'),
+    }
+    variants = {
+        'plain': lambda render: render().to_json(),
+        'compact': lambda render: json.dumps(compact_figure(render()), default=str),
+    }
+    results = {}
+    for (figure, render), (name, serialize) in itertools.product(figures.items(), variants.items()):
+        build = functools.partial(serialize, render)
+        text = build()
+        key = f'first_render.{figure}_{name}'
+        timings = {
+            'server': _best_ms(build, repeat),
+            'transfer': len(gzip.compress(text.encode())) * 8 / SLOW_LINK_KBPS + SLOW_LINK_RTT_MS,
+        }
+        if node:
+            path = os.path.join(workdir, f'{key}.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            output = subprocess.run([node, '-e', DECODE_SCRIPT, path, str(repeat)], check=True,
+                                    capture_output=True, text=True).stdout
+            timings['decode'] = float(output)
+        timings['total'] = sum(timings.values())
+        results.update({f'{key}_{part}_ms': value for part, value in timings.items()})
+    return results
+
+
+# 로컬 차트 API 대역 서버에서 받는 시간 (요청마다 latency초 지연, 순차 vs 동시)
+def bench_fetch(tickers=200, days=1260, latency=0.005):
+    from benchmarks.chart_server import ChartServer
+    from fetcher import HttpChartProvider
+
+    close = synthetic_prices(synthetic_tickers(tickers, STRATEGY_TICKERS), days)
+    results = {}
+    with ChartServer(close, latency=latency) as server:
+        for name, concurrency in (('sequential', 1), ('concurrent', 8)):
+            provider = HttpChartProvider(server.base_url, concurrency=concurrency)
+            start = time.perf_counter()
+            provider.fetch(list(close.columns), close.index[0])
+            results[f'fetch.{tickers}x{days}_{name}_ms'] = (time.perf_counter() - start) * 1000
+    return results
+
+
+# 몬테카를로 시뮬레이션 시간 (20년 합성 가격, 한 프로세스)
+def bench_simulation(paths=10000, years=5, repeat=1):
+    from simulation import simulate
+
+    close = synthetic_prices(STRATEGY_TICKERS, 252 * 20)
+    return {f'simulation.{paths}x{years}y_ms': _best_ms(
+        lambda: simulate(close, paths=paths, years=years, workers=1), repeat)}
+
+
+# 스냅샷 하나가 잡는 배열 메모리 (파생 프레임까지 모두 만든 뒤, MarketSnapshot.memory_usage 합계)
+def bench_memory(workdir, sizes, days=252 * 20):
+    import snapshot
+    from price_store import CSVProvider, PriceStore
+
+    results = {}
+    for size in sizes:
+        tickers = synthetic_tickers(size, STRATEGY_TICKERS)
+        csv_path = write_fixture_csv(os.path.join(workdir, f'memory-{size}.csv'), tickers, days)
+        store = PriceStore(os.path.join(workdir, f'memory-{size}'), provider=CSVProvider(csv_path))
+        store.update(tickers, snapshot._history_start())
+        built = snapshot.build_snapshot(store, tickers, 1, fetch=False, simulate=True)
+        for name in ('returns_1y', 'returns_6m', 'weekly_returns', 'monthly_returns', 'weekly_returns_6m',
+                     'monthly_returns_6m'):
+            getattr(built, name)
+        results[f'memory.snapshot_{size}x{days}_bytes'] = sum(built.memory_usage().values())
+    return results
+
+
+# 스냅샷을 만들 때 쓰는 지표 / 위험 엔진과 create_return_plot 실행 시간, 그림 크기 (유니버스 크기 x 기간)
+#   compute : 전체 기간을 처음 계산, extend : 이전 결과에 새 봉 하나만 이어서 계산 (평소 갱신)
+def bench_functions(app_module, sizes, histories, repeat):
+    from snapshot import indicator_engine, risk_engine
+
+    results = {}
+    for size in sizes:
+        for days in histories:
+            close = synthetic_prices(synthetic_tickers(size, STRATEGY_TICKERS[:min(size, 11)]), days, seed=size)
+            returns = close / close.iloc[0] - 1
+            key = f'{size}x{days}'
+            for name, engine in (('indicators', indicator_engine), ('risk', risk_engine)):
+                previous = engine.compute(close.iloc[:-1])
+                results[f'{name}.compute.{key}_ms'] = _best_ms(lambda: engine.compute(close), repeat)
+                results[f'{name}.extend.{key}_ms'] = _best_ms(lambda: engine.extend(previous, close), repeat)
+            results[f'create_return_plot.{key}_ms'] = _best_ms(
+                lambda: app_module.create_return_plot(returns, 'year'), repeat)
+            results[f'payload.create_return_plot.{key}_bytes'] = len(
+                app_module.create_return_plot(returns, 'year').to_json())
+            if app_module.COMPACT_FIGURES:
+                results[f'payload.create_return_plot_compact.{key}_bytes'] = len(json.dumps(
+                    app_module.compact_figure(app_module.create_return_plot(returns, 'year')), default=str))
+    return results
+
+
+def run(quick=False):
+    workdir = tempfile.mkdtemp(prefix='bench-')
+    csv_path = write_fixture_csv(os.path.join(workdir, 'prices.csv'), STRATEGY_TICKERS, 252 * 20)
+    env = dict(os.environ, PRICE_CSV=csv_path, PRICE_STORE_DIR=os.path.join(workdir, 'store'),
+               CLIENTSIDE_SWITCHING='0')
+    os.environ.update(env)
+
+    repeat = 3 if quick else 10
+    results = {}
+    try:
+        results.update(bench_startup(env, workdir, repeat=2 if quick else 5))
+
+        import app as app_module  # 저장소가 채워진 뒤 같은 고정 데이터로 import
+        _wait_complete(app_module)
+        results.update(bench_callbacks(app_module, repeat))
+        results.update(bench_first_render(app_module, workdir, repeat))
+        sizes = [11, 100] if quick else [11, 100, 500]
+        histories = [252, 1260] if quick else [252, 1260, 5040]
+        results.update(bench_functions(app_module, sizes, histories, repeat=2 if quick else 3))
+        results.update(bench_fetch(tickers=50 if quick else 200))
+        results.update(bench_memory(workdir, [100] if quick else [100, 1000]))
+        results.update(bench_simulation(paths=2000 if quick else 10000, repeat=1 if quick else 3))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu': cpu_model(),
+            'cpu_count': os.cpu_count(),
+            'quick': quick,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+# CPU 모델 이름 (리눅스는 /proc/cpuinfo, 그 외는 platform.processor())
+def cpu_model():
+    try:
+        with open('/proc/cpuinfo', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+# 시간 측정값은 같은 CPU / 코어 수에서 잰 기준선과만 비교할 수 있음
+def same_hardware(current, baseline):
+    return all(current['meta'].get(name) == baseline['meta'].get(name) for name in ('cpu', 'cpu_count'))
+
+
+# 기준선과 비교해 (회귀 목록, 기준선에 없는 키 목록) 반환 (시간은 *_ms, 크기는 *_bytes)
+# 기준선에 없는 키는 비교할 수 없으므로 따로 알려 줌 (새 항목을 추가했으면 --save-baseline으로 기준선을 다시 만듦)
+# 하드웨어가 다른 기준선이면 시간은 비교하지 않고 크기만 비교
+def compare(current, baseline, time_tolerance=DEFAULT_TIME_TOLERANCE, size_tolerance=DEFAULT_SIZE_TOLERANCE,
+            min_delta_ms=DEFAULT_MIN_DELTA_MS):
+    compare_times = same_hardware(current, baseline)
+    regressions, missing = [], []
+    for key, value in current['results'].items():
+        previous = baseline['results'].get(key)
+        if previous is None:
+            missing.append(key)
+            continue
+        if previous <= 0 or not (compare_times or key.endswith('_bytes')):
+            continue
+        if key.endswith('_bytes'):
+            regressed = value > previous * (1 + size_tolerance)
+        else:
+            regressed = value > previous * (1 + time_tolerance) and value - previous > min_delta_ms
+        if regressed:
+            regressions.append((key, previous, value))
+    return regressions, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description='대시보드 오프라인 벤치마크')
+    parser.add_argument('--quick', action='store_true', help='작은 조합과 적은 반복으로 빠르게 실행')
+    parser.add_argument('--output', help='결과 JSON 저장 경로')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='비교할 기준선 JSON')
+    parser.add_argument('--save-baseline', action='store_true', help='이번 결과를 기준선으로 저장')
+    parser.add_argument('--time-tolerance', type=float, default=DEFAULT_TIME_TOLERANCE)
+    parser.add_argument('--size-tolerance', type=float, default=DEFAULT_SIZE_TOLERANCE)
+    args = parser.parse_args()
+
+    current = run(quick=args.quick)
+    text = json.dumps(current, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    print(text)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions, missing = compare(current, baseline, args.time_tolerance, args.size_tolerance)
+    for key in missing:
+        print(f'MISSING {key}: not in baseline {args.baseline}', file=sys.stderr)
+    if not same_hardware(current, baseline):
+        print(f"timings not compared: baseline ran on {baseline['meta'].get('cpu')} x{baseline['meta'].get('cpu_count')}, "
+              f"this run on {current['meta']['cpu']} x{current['meta']['cpu_count']}", file=sys.stderr)
+    for key, previous, value in regressions:
+        print(f'REGRESSION {key}: {previous:.2f} -> {value:.2f}', file=sys.stderr)
+    # 시간은 같은 하드웨어에서도 잡음이 있으므로 알리기만 하고, 결정적인 크기(*_bytes) 회귀만 실패로 처리
+    return 1 if any(key.endswith('_bytes') for key, _, _ in regressions) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,197 @@
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+
+from metrics import FETCH_RETRIES
+
+
+logger = logging.getLogger(__name__)
+
+# 일봉 차트 API 주소 (로컬 대역 서버로 바꿔서 테스트 가능: benchmarks/chart_server.py)
+DEFAULT_BASE_URL = os.environ.get('PRICE_HTTP_BASE_URL', 'https://query1.finance.yahoo.com')
+
+# 동시에 보내는 요청 수 (= 연결 풀 크기)
+DEFAULT_CONCURRENCY = int(os.environ.get('PRICE_FETCH_CONCURRENCY', '8'))
+
+# 요청 하나의 제한 시간 (초, 연결/읽기 각각)
+DEFAULT_TIMEOUT = float(os.environ.get('PRICE_FETCH_TIMEOUT', '10'))
+
+# 실패 시 다시 시도하는 횟수와 첫 대기 시간 (초, 시도마다 두 배 + 무작위 지터)
+DEFAULT_RETRIES = int(os.environ.get('PRICE_FETCH_RETRIES', '3'))
+DEFAULT_BACKOFF = float(os.environ.get('PRICE_FETCH_BACKOFF', '0.5'))
+
+# 서버가 Retry-After로 요구해도 이보다 오래 기다리지는 않음 (초)
+MAX_RETRY_AFTER = 60.0
+
+# 다시 시도할 HTTP 상태 (rate limit / 서버 오류)
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+USER_AGENT = 'Mozilla/5.0 (compatible; dual-momentum-dashboard)'
+
+
+class FetchError(Exception):
+    pass
+
+
+# 같은 키로 동시에 들어온 호출은 먼저 시작한 호출 하나의 결과를 같이 받음 (끝나면 키를 지워서 다음 호출은 새로 받음)
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            future.set_result(func())
+        except BaseException as error:
+            future.set_exception(error)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result()
+
+
+# 가격 제공자를 감싸서 같은 (티커, 기간) 요청이 동시에 여러 번 나가지 않게 함
+class CoalescingProvider:
+    def __init__(self, provider):
+        self.provider = provider
+        self.flights = SingleFlight()
+
+    def fetch(self, tickers, start, end=None):
+        tickers = list(tickers)
+        key = (tuple(tickers), str(pd.Timestamp(start)), str(pd.Timestamp(end)) if end is not None else None)
+        return self.flights.do(key, lambda: self.provider.fetch(tickers, start, end))
+
+
+def _epoch_seconds(value):
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize('UTC')
+    return int(timestamp.timestamp())
+
+
+# 차트 API 응답 하나를 날짜 -> 종가 Series로 변환 (거래소 시간대의 날짜 기준)
+def parse_chart(payload, ticker, field='adjclose'):
+    chart = payload.get('chart') or {}
+    results = chart.get('result') or []
+    if not results or not results[0].get('timestamp'):
+        return pd.Series(dtype=float, name=ticker)
+    result = results[0]
+    indicators = result.get('indicators') or {}
+    if field == 'adjclose' and indicators.get('adjclose'):
+        values = indicators['adjclose'][0]['adjclose']
+    else:
+        values = indicators['quote'][0]['close']
+    timezone = (result.get('meta') or {}).get('exchangeTimezoneName') or 'America/New_York'
+    index = pd.to_datetime(result['timestamp'], unit='s', utc=True).tz_convert(timezone).tz_localize(None).normalize()
+    series = pd.Series(pd.to_numeric(values, errors='coerce'), index=index, name=ticker, dtype=float)
+    # 장중에는 마지막 봉이 같은 날짜로 한 번 더 올 수 있음
+    return series[~series.index.duplicated(keep='last')]
+
+
+# 티커마다 일봉 차트 API를 호출하는 제공자
+#   하나의 requests.Session(연결 풀)을 공유하고, 배치 안의 티커는 concurrency개씩 동시에 받음
+#   연결 실패 / 제한 시간 초과 / 429·5xx는 지수 백오프로 다시 시도하고, 끝내 실패하면 FetchError
+#   (이 경우 저장소를 갱신하지 않으므로 이전 스냅샷으로 계속 서비스)
+#   없는 티커(404)는 빈 열로 돌려줌
+class HttpChartProvider:
+    def __init__(self, base_url=DEFAULT_BASE_URL, field='adjclose', concurrency=DEFAULT_CONCURRENCY,
+                 timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, session=None):
+        self.base_url = base_url.rstrip('/')
+        self.field = field
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._session = session
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._make_session()
+        return self._session
+
+    def _make_session(self):
+        import requests  # 실제로 받을 때만 불러옴
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency, max_retries=0)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['User-Agent'] = USER_AGENT
+        return session
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.concurrency, thread_name_prefix='price-fetch')
+        return self._executor
+
+    def fetch(self, tickers, start, end=None):
+        tickers = list(tickers)
+        params = {
+            'period1': _epoch_seconds(start),
+            'period2': _epoch_seconds(end) if end is not None else int(time.time()),
+            'interval': '1d',
+            'events': 'div,split',
+        }
+        series = list(self.executor.map(lambda ticker: self._fetch_one(ticker, params), tickers))
+        frame = pd.concat(series, axis=1) if series else pd.DataFrame()
+        frame = frame.reindex(columns=tickers)
+        if end is not None and not frame.empty:
+            frame = frame.loc[frame.index < pd.Timestamp(end)]
+        return frame
+
+    def _fetch_one(self, ticker, params):
+        import requests
+
+        url = f'{self.base_url}/v8/finance/chart/{ticker}'
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                reason = f'{type(error).__name__}: {error}'
+            else:
+                if response.status_code == 404:
+                    return pd.Series(dtype=float, name=ticker)
+                if response.status_code not in RETRY_STATUSES:
+                    try:
+                        response.raise_for_status()
+                        return parse_chart(response.json(), ticker, self.field)
+                    except (requests.HTTPError, ValueError) as error:
+                        raise FetchError(f'{ticker}: {error}') from error
+                reason = f'HTTP {response.status_code}'
+                retry_after = response.headers.get('Retry-After')
+            if attempt == self.retries:
+                raise FetchError(f'{ticker}: {reason} ({attempt + 1} attempts)')
+            FETCH_RETRIES.inc(provider=type(self).__name__)
+            delay = self._delay(attempt, retry_after)
+            logger.warning('fetch %s failed (%s); retrying in %.2fs', ticker, reason, delay)
+            time.sleep(delay)
+
+    def _delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), MAX_RETRY_AFTER)
+            except ValueError:
+                pass
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
@@ -0,0 +1,150 @@
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from flask import Response, request
+from plotly.io.json import to_json_plotly
+
+try:
+    import brotli  # 선택 의존성: 있으면 br 인코딩도 제공
+except ImportError:
+    brotli = None
+
+
+DEFAULT_MAX_ENTRIES = 256
+
+# 이 크기보다 작은 응답은 압축하지 않음
+MIN_COMPRESS_BYTES = 1024
+
+
+# 직렬화된 그림 한 개: JSON 바이트, ETag, 압축본, 콜백에서 돌려줄 dict
+# 압축본은 /figures 응답에서 그 인코딩이 처음 필요할 때 한 번만 만듦 (dict로만 쓰는 항목은 압축하지 않음)
+class CachedFigure:
+    def __init__(self, payload):
+        self.body = payload
+        self.etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+        self._gzip = None
+        self._brotli = None
+        self._figure = None
+
+    @property
+    def gzip(self):
+        if self._gzip is None:
+            self._gzip = gzip.compress(self.body, compresslevel=6)
+        return self._gzip
+
+    @property
+    def brotli(self):
+        if self._brotli is None and brotli:
+            self._brotli = brotli.compress(self.body)
+        return self._brotli
+
+    @property
+    def figure(self):
+        # Dash 콜백용 dict는 처음 필요할 때 한 번만 만듦
+        if self._figure is None:
+            self._figure = json.loads(self.body)
+        return self._figure
+
+
+# (그림 종류, 기간, 종목, 스냅샷 버전) -> 직렬화된 그림 LRU 캐시
+class FigureCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def get_or_build(self, key, build):
+        entry = self.get(key)
+        if entry is None:
+            # 같은 키를 동시에 만들 수도 있지만 결과가 같으므로 나중 것으로 덮어씀
+            # go.Figure 또는 이미 dict로 변환된 그림(payload.compact_figure) 모두 허용
+            figure = build()
+            payload = figure.to_json() if hasattr(figure, 'to_json') else to_json_plotly(figure)
+            entry = self.put(key, CachedFigure(payload.encode('utf-8')))
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _accepts(encoding):
+    return encoding in request.headers.get('Accept-Encoding', '').lower()
+
+
+def _compress(body):
+    if brotli and _accepts('br'):
+        return brotli.compress(body), 'br'
+    if _accepts('gzip'):
+        return gzip.compress(body, compresslevel=6), 'gzip'
+    return body, None
+
+
+# If-None-Match 헤더가 이 ETag와 맞는지 (쉼표로 나뉜 목록, W/ 약한 태그, '*' 허용)
+def _etag_matches(etag, header):
+    tags = [tag.strip() for tag in header.split(',')]
+    return any(tag == '*' or tag.removeprefix('W/') == etag for tag in tags)
+
+
+# 캐시된 그림을 ETag / 압축 협상과 함께 응답
+def figure_response(entry, max_age=300):
+    headers = {
+        'ETag': entry.etag,
+        'Cache-Control': f'public, max-age={max_age}',
+        'Vary': 'Accept-Encoding',
+    }
+    if _etag_matches(entry.etag, request.headers.get('If-None-Match', '')):
+        return Response(status=304, headers=headers)
+
+    body = entry.body
+    if brotli and _accepts('br'):
+        body, headers['Content-Encoding'] = entry.brotli, 'br'
+    elif _accepts('gzip'):
+        body, headers['Content-Encoding'] = entry.gzip, 'gzip'
+    return Response(body, mimetype='application/json', headers=headers)
+
+
+# Dash 콜백 응답(/_dash-update-component)도 클라이언트가 받으면 압축해서 보냄
+def install_compression(server):
+    @server.after_request
+    def compress_dash_response(response):
+        if (not request.path.endswith('_dash-update-component') or response.status_code != 200
+                or response.direct_passthrough or 'Content-Encoding' in response.headers):
+            return response
+        body = response.get_data()
+        if len(body) < MIN_COMPRESS_BYTES:
+            return response
+        compressed, encoding = _compress(body)
+        if encoding:
+            response.set_data(compressed)
+            response.headers['Content-Encoding'] = encoding
+            response.headers['Vary'] = 'Accept-Encoding'
+        return response
+
+    return compress_dash_response
@@ -0,0 +1,218 @@
+import numpy as np
+import pandas as pd
+
+
+# 스냅샷에 보관하는 지표 행렬 형식 (계산과 다음 봉을 위한 상태는 float64)
+VALUE_DTYPE = np.float32
+
+
+# 보조지표 기본 클래스
+#   compute(prices)    : (날짜 수 x 자산 수) 가격 행렬 전체 계산 -> ({출력 이름: 행렬}, 마지막 상태)
+#   update(state, row) : 새 봉 한 줄(자산 수)만 반영 -> ({출력 이름: 한 줄}, 새 상태)
+# compute는 update를 날짜 순서대로 반복한 것과 같은 결과를 내야 함
+class Indicator:
+    outputs = ()
+
+    def compute(self, prices):
+        state = self.initial_state(prices.shape[1])
+        results = {name: np.full(prices.shape, np.nan) for name in self.outputs}
+        for i, row in enumerate(prices):
+            values, state = self.update(state, row)
+            for name in self.outputs:
+                results[name][i] = values[name]
+        return results, state
+
+    def initial_state(self, n_assets):
+        raise NotImplementedError
+
+    def update(self, state, row):
+        raise NotImplementedError
+
+
+def _ema_step(previous, weight, value, alpha):
+    # pandas ewm(adjust=False)와 같게: 첫 값으로 시작하고, 결측이면 이전 값을 유지하되 그 가중치는 (1 - alpha)씩 줄어듦
+    # 결측 뒤 첫 값은 (weight * 이전 값 + alpha * 값) / (weight + alpha), 관측이 있으면 가중치는 다시 1
+    started = ~np.isnan(previous)
+    observed = ~np.isnan(value)
+    weight = np.where(started, weight * (1 - alpha), weight)
+    with np.errstate(invalid='ignore'):
+        blended = (weight * previous + alpha * value) / (weight + alpha)
+    updated = np.where(started, np.where(observed, blended, previous), value)
+    return updated, np.where(started & observed, 1.0, weight)
+
+
+# MACD 오실레이터 (MACD - 시그널), 화면에서 쓰는 오실레이터만 행렬로 보관
+class MACD(Indicator):
+    outputs = ('macd_osc',)
+
+    def __init__(self, short_window=12, long_window=26, signal_window=9):
+        self.short_alpha = 2 / (short_window + 1)
+        self.long_alpha = 2 / (long_window + 1)
+        self.signal_alpha = 2 / (signal_window + 1)
+
+    def initial_state(self, n_assets):
+        empty, ones = np.full(n_assets, np.nan), np.ones(n_assets)
+        return {'short': (empty, ones), 'long': (empty, ones), 'signal': (empty, ones)}
+
+    def update(self, state, row):
+        short = _ema_step(*state['short'], row, self.short_alpha)
+        long = _ema_step(*state['long'], row, self.long_alpha)
+        macd = short[0] - long[0]
+        signal = _ema_step(*state['signal'], macd, self.signal_alpha)
+        return {'macd_osc': macd - signal[0]}, {'short': short, 'long': long, 'signal': signal}
+
+
+def _rolling_sum(values, window):
+    # 누적합 차이로 구간 합 계산 (앞쪽 window-1개는 NaN)
+    cumsum = np.cumsum(values, axis=0)
+    sums = np.full(values.shape, np.nan)
+    sums[window - 1:] = cumsum[window - 1:]
+    sums[window:] -= cumsum[:-window]
+    return sums
+
+
+def _rsi(gain, loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 - (100 / (1 + gain / loss))
+
+
+# RSI (상승폭/하락폭의 단순 이동평균 방식: rolling(window).mean() 기준)
+class RSI(Indicator):
+    outputs = ('rsi',)
+
+    def __init__(self, window=14):
+        self.window = window
+
+    def compute(self, prices):
+        delta = np.diff(prices, axis=0, prepend=np.nan)
+        gains = np.where(delta > 0, delta, 0.0)
+        losses = np.where(delta < 0, -delta, 0.0)
+        rsi = _rsi(_rolling_sum(gains, self.window), _rolling_sum(losses, self.window))
+
+        state = self.initial_state(prices.shape[1])
+        tail = min(self.window, len(prices))
+        if tail:
+            state['gains'][-tail:] = gains[-tail:]
+            state['losses'][-tail:] = losses[-tail:]
+            state['last'] = prices[-1].copy()
+            state['count'] = len(prices)
+        return {'rsi': rsi}, state
+
+    def initial_state(self, n_assets):
+        return {
+            'last': np.full(n_assets, np.nan),
+            'gains': np.zeros((self.window, n_assets)),
+            'losses': np.zeros((self.window, n_assets)),
+            'count': 0,
+        }
+
+    def update(self, state, row):
+        delta = row - state['last']
+        gains = np.vstack([state['gains'][1:], np.where(delta > 0, delta, 0.0)])
+        losses = np.vstack([state['losses'][1:], np.where(delta < 0, -delta, 0.0)])
+        count = state['count'] + 1
+        if count >= self.window:
+            rsi = _rsi(gains.sum(axis=0), losses.sum(axis=0))
+        else:
+            rsi = np.full(row.shape, np.nan)
+        return {'rsi': rsi}, {'last': row.copy(), 'gains': gains, 'losses': losses, 'count': count}
+
+
+# 볼린저 밴드 (이동평균 ± k * 표준편차)
+class Bollinger(Indicator):
+    outputs = ('bb_mid', 'bb_upper', 'bb_lower')
+
+    def __init__(self, window=20, k=2.0):
+        self.window = window
+        self.k = k
+
+    def compute(self, prices):
+        results = {name: np.full(prices.shape, np.nan) for name in self.outputs}
+        if len(prices) >= self.window:
+            windows = np.lib.stride_tricks.sliding_window_view(prices, self.window, axis=0)
+            mid = windows.mean(axis=-1)
+            std = windows.std(axis=-1, ddof=1)
+            results['bb_mid'][self.window - 1:] = mid
+            results['bb_upper'][self.window - 1:] = mid + self.k * std
+            results['bb_lower'][self.window - 1:] = mid - self.k * std
+
+        state = self.initial_state(prices.shape[1])
+        tail = min(self.window, len(prices))
+        if tail:
+            state['prices'][-tail:] = prices[-tail:]
+        return results, state
+
+    def initial_state(self, n_assets):
+        return {'prices': np.full((self.window, n_assets), np.nan)}
+
+    def update(self, state, row):
+        prices = np.vstack([state['prices'][1:], row])
+        mid = prices.mean(axis=0)
+        std = prices.std(axis=0, ddof=1)
+        values = {'bb_mid': mid, 'bb_upper': mid + self.k * std, 'bb_lower': mid - self.k * std}
+        return values, {'prices': prices}
+
+
+# 지표 계산 결과 (날짜 x 자산 행렬 묶음) + 다음 봉을 위한 상태
+class IndicatorSet:
+    def __init__(self, index, columns, values, states, last_row):
+        self.index = index
+        self.columns = list(columns)
+        self.values = values
+        self.states = states
+        self.last_row = last_row
+        self._positions = {asset: i for i, asset in enumerate(self.columns)}
+
+    # 종목 선택 시 계산 없이 미리 만든 행렬에서 한 열만 꺼냄
+    def series(self, name, asset):
+        return pd.Series(self.values[name][:, self._positions[asset]], index=self.index, name=asset)
+
+
+# 기존 구간이 그대로이고 뒤에 봉만 늘었으면 새 봉들(행렬), 아니면 None (전체 재계산 필요)
+# previous는 index / columns / states / last_row를 가진 계산 결과 (IndicatorSet, risk.RiskSet)
+def appended_rows(previous, close):
+    if previous is None or previous.states is None:
+        return None
+    if list(close.columns) != previous.columns or len(close) < len(previous.index):
+        return None
+    n_old = len(previous.index)
+    if not close.index[:n_old].equals(previous.index):
+        return None
+    if n_old and not np.array_equal(close.iloc[n_old - 1].to_numpy(dtype=np.float64), previous.last_row,
+                                    equal_nan=True):
+        return None
+    return close.iloc[n_old:].to_numpy(dtype=np.float64)
+
+
+# 전체 자산의 보조지표를 한 번에 계산하고, 새 봉은 이전 상태에서 이어서 계산
+class IndicatorEngine:
+    def __init__(self, indicators=None):
+        self.indicators = indicators or [MACD(), RSI()]
+
+    def compute(self, close):
+        prices = close.to_numpy(dtype=np.float64)
+        values, states = {}, []
+        for indicator in self.indicators:
+            results, state = indicator.compute(prices)
+            values.update({name: matrix.astype(VALUE_DTYPE) for name, matrix in results.items()})
+            states.append(state)
+        last_row = prices[-1].copy() if len(prices) else None
+        return IndicatorSet(close.index, close.columns, values, states, last_row)
+
+    def extend(self, previous, close):
+        new_rows = appended_rows(previous, close)
+        if new_rows is None:
+            return self.compute(close)
+        if not len(new_rows):
+            return previous
+        n_old = len(previous.index)
+
+        values = {name: np.vstack([matrix, np.full((len(new_rows), matrix.shape[1]), np.nan, dtype=VALUE_DTYPE)])
+                  for name, matrix in previous.values.items()}
+        states = list(previous.states)
+        for offset, row in enumerate(new_rows):
+            for i, indicator in enumerate(self.indicators):
+                row_values, states[i] = indicator.update(states[i], row)
+                for name, value in row_values.items():
+                    values[name][n_old + offset] = value
+        return IndicatorSet(close.index, close.columns, values, states, new_rows[-1].copy())
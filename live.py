@@ -0,0 +1,157 @@
+import datetime
+import os
+import threading
+import time
+from dataclasses import dataclass
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+from universe import top_k
+from windows import window_base
+
+
+# 장중 실시간 모드 시세 제공자: simulated(로컬 랜덤워크) / yahoo, 비우면 실시간 모드 끔
+LIVE_QUOTES = os.environ.get('LIVE_QUOTES', '')
+
+# 브라우저가 실시간 시세를 확인하는 주기 (밀리초). 여러 사용자가 같은 주기 안에 요청하면 한 번만 받음
+LIVE_POLL_MS = int(os.environ.get('LIVE_POLL_MS', '60000'))
+
+# 미국 정규장 시간
+MARKET_TZ = ZoneInfo('America/New_York')
+MARKET_OPEN = datetime.time(9, 30)
+MARKET_CLOSE = datetime.time(16, 0)
+
+
+def is_market_open(now=None):
+    now = now or datetime.datetime.now(MARKET_TZ)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+# 마지막 종가에서 출발하는 랜덤워크 시세 (테스트 / 오프라인 실행용, 장 시간과 무관하게 동작)
+class SimulatedQuoteFeed:
+    market_hours_only = False
+
+    def __init__(self, volatility=0.001, seed=None):
+        self.volatility = volatility
+        self.random = np.random.default_rng(seed)
+        self._tickers = None
+        self._prices = None
+
+    def quotes(self, tickers, last_close):
+        if self._tickers != list(tickers):
+            self._tickers = list(tickers)
+            self._prices = np.asarray(last_close, dtype=np.float64).copy()
+        self._prices = self._prices * np.exp(self.random.normal(0.0, self.volatility, len(self._prices)))
+        return self._prices.copy()
+
+
+# 야후 파이낸스 1분봉의 마지막 가격
+class YahooQuoteFeed:
+    market_hours_only = True
+
+    def quotes(self, tickers, last_close):
+        import yfinance as yf  # 무거운 모듈이라 실제로 받을 때만 불러옴
+
+        data = yf.download(list(tickers), period='1d', interval='1m', progress=False)
+        if data.empty:
+            return np.full(len(tickers), np.nan)
+        close = data['Close']
+        if isinstance(close, pd.Series):
+            close = close.to_frame(tickers[0])
+        return close.ffill().iloc[-1].reindex(list(tickers)).to_numpy(dtype=np.float64)
+
+
+QUOTE_FEEDS = {'simulated': SimulatedQuoteFeed, 'yahoo': YahooQuoteFeed}
+
+
+def default_feed():
+    return QUOTE_FEEDS[LIVE_QUOTES]() if LIVE_QUOTES else None
+
+
+# 실시간 시세 한 번 반영한 결과. 스냅샷과 같은 이름의 한 줄짜리 프레임이라
+# investment_decision / target_weights에 스냅샷 대신 그대로 넘길 수 있음
+@dataclass(frozen=True)
+class LiveTick:
+    time: pd.Timestamp
+    close_data: pd.DataFrame   # 실시간 가격
+    returns_1y: pd.DataFrame   # 1년 구간 첫날 대비 누적 수익률
+    returns_6m: pd.DataFrame   # 6개월 구간 첫날 대비 누적 수익률
+    ranking: list              # 모멘텀 상위 (티커, 수익률)
+
+    @property
+    def last_close(self):
+        return self.close_data.iloc[-1]
+
+    @property
+    def milliseconds(self):
+        return self.time.value // 1_000_000
+
+
+# 스냅샷마다 한 번 기준 가격(구간 첫날, 모멘텀 lookback, 마지막 종가)을 뽑아 두고
+# 시세가 들어오면 자산 수만큼만 계산 (전체 기간 수익률 재계산 없음)
+class LiveBoard:
+    def __init__(self, close_history, close_data, close_data_6m, lookback=252, k=20, last_close=None):
+        self.tickers = list(close_history.columns)
+        self.base_1y = window_base(close_data).to_numpy(dtype=np.float64)
+        self.base_6m = window_base(close_data_6m).to_numpy(dtype=np.float64)
+        tail = close_history.iloc[-(lookback + 1):].ffill()
+        # 시세가 없는 종목은 마지막 종가 (스냅샷의 float64 종가가 있으면 그것을 씀)
+        self.last_close = (last_close if last_close is not None else tail.iloc[-1]).to_numpy(dtype=np.float64)
+        # 저장소에 오늘 봉이 이미 있으면 시세가 그 줄을 대신하고, 없으면 새 줄로 붙는 것으로 보고
+        # 모멘텀 순위 표(LogPriceIndex.trailing_returns)와 같은 lookback 거래일 전 가격을 고름
+        today = pd.Timestamp.now(tz=MARKET_TZ).tz_localize(None).normalize()
+        offset = lookback + 1 if len(tail) and tail.index[-1] >= today else lookback
+        self.momentum_base = tail.iloc[-offset].to_numpy(dtype=np.float64) if len(tail) >= offset else None
+        self.k = k
+
+    @classmethod
+    def from_snapshot(cls, snapshot, **kwargs):
+        return cls(snapshot.close_history, snapshot.close_data, snapshot.close_data_6m,
+                   last_close=snapshot.last_close, **kwargs)
+
+    def tick(self, quotes, now=None):
+        quotes = np.asarray(quotes, dtype=np.float64)
+        prices = np.where(np.isfinite(quotes), quotes, self.last_close)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns_1y = prices / self.base_1y - 1
+            returns_6m = prices / self.base_6m - 1
+            scores = prices / self.momentum_base - 1 if self.momentum_base is not None else returns_1y
+        picks = top_k(scores, self.k)
+
+        index = pd.DatetimeIndex([now or pd.Timestamp.now(tz=MARKET_TZ).tz_localize(None)])
+        return LiveTick(
+            time=index[0],
+            close_data=pd.DataFrame(prices[None, :], index=index, columns=self.tickers),
+            returns_1y=pd.DataFrame(returns_1y[None, :], index=index, columns=self.tickers),
+            returns_6m=pd.DataFrame(returns_6m[None, :], index=index, columns=self.tickers),
+            ranking=[(self.tickers[i], float(scores[i])) for i in picks],
+        )
+
+
+# 스냅샷이 바뀔 때만 LiveBoard를 다시 만들고, 시세는 min_interval 초에 한 번만 받아 모든 요청이 공유
+class LiveSession:
+    def __init__(self, feed, min_interval=LIVE_POLL_MS / 1000, k=20):
+        self.feed = feed
+        self.min_interval = min_interval
+        self.k = k
+        self._lock = threading.Lock()
+        self._board = None
+        self._version = None
+        self._tick = None
+        self._fetched_at = 0.0
+
+    def tick(self, snapshot):
+        if self.feed.market_hours_only and not is_market_open():
+            return None
+        with self._lock:
+            if self._version != snapshot.version:
+                self._board = LiveBoard.from_snapshot(snapshot, k=self.k)
+                self._version = snapshot.version
+                self._tick = None
+            if self._tick is None or time.monotonic() - self._fetched_at >= self.min_interval:
+                quotes = self.feed.quotes(self._board.tickers, self._board.last_close)
+                self._tick = self._board.tick(quotes)
+                self._fetched_at = time.monotonic()
+            return self._tick
@@ -0,0 +1,338 @@
+import bisect
+import collections
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, request
+
+
+# 기본 지연시간 버킷 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 느린 요청 프로파일러: 이 시간(ms)을 넘긴 요청의 스택 샘플을 PROFILE_DIR에 남김 (0이면 끔)
+PROFILE_SLOW_MS = float(os.environ.get('PROFILE_SLOW_MS', '0'))
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', '5'))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'profiles'))
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _Metric:
+    type_name = ''
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type_name}']
+
+
+class Counter(_Metric):
+    type_name = 'counter'
+
+    def __init__(self, name, documentation, labelnames=(), collect=None):
+        super().__init__(name, documentation, labelnames)
+        self._values = collections.defaultdict(float)
+        self.collect = collect
+
+    def inc(self, amount=1.0, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] += amount
+
+    def render(self):
+        if self.collect is not None:
+            items = list(self.collect())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return self.header() + [
+            f'{self.name}{_format_labels(self.labelnames, map(_escape, key))} {value}' for key, value in items]
+
+
+# 값을 읽을 때마다 collect 함수로 계산하는 게이지 (스냅샷 나이, 대기열 길이 등)
+class Gauge(Counter):
+    type_name = 'gauge'
+
+    def set(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        with self._lock:
+            items = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        lines = self.header()
+        for key, counts, total, count in items:
+            values = tuple(map(_escape, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                labels = _format_labels(self.labelnames + ('le',), values + (le,))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f'{self.name}_sum{labels} {total}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+# 이름별로 한 개씩만 보관: 같은 이름을 다시 등록하면(create_app을 여러 번 호출 등) 자리는 그대로 두고 새 것으로 바꿈
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+CALLBACK_SECONDS = REGISTRY.register(Histogram(
+    'dash_callback_duration_seconds', 'Dash 콜백 처리 시간', ('callback',)))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'http_request_duration_seconds', 'HTTP 요청 처리 시간', ('endpoint', 'status')))
+FETCH_SECONDS = REGISTRY.register(Histogram(
+    'price_fetch_duration_seconds', '가격 데이터 제공자 요청 시간', ('provider',)))
+FETCH_ERRORS = REGISTRY.register(Counter(
+    'price_fetch_errors_total', '가격 데이터 요청 실패 수', ('provider',)))
+FETCH_RETRIES = REGISTRY.register(Counter(
+    'price_fetch_retries_total', '가격 데이터 요청 재시도 수', ('provider',)))
+SNAPSHOT_BUILD_SECONDS = REGISTRY.register(Histogram(
+    'snapshot_build_duration_seconds', '시장 스냅샷 생성 시간 (저장소 갱신, 리샘플링, 지표 포함)'))
+FIGURE_BUILD_SECONDS = REGISTRY.register(Histogram(
+    'figure_build_duration_seconds', '그림 생성 및 직렬화 시간', ('kind',)))
+IN_FLIGHT = REGISTRY.register(Gauge('http_requests_in_flight', '처리 중인 HTTP 요청 수'))
+
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+# 가격 제공자를 감싸서 요청 시간과 실패 수를 기록
+class InstrumentedProvider:
+    def __init__(self, provider):
+        self.provider = provider
+        # 동시 요청 합치기(CoalescingProvider) 등으로 감싼 경우 실제 제공자 이름으로 기록
+        self.label = type(getattr(provider, 'provider', provider)).__name__
+
+    def fetch(self, tickers, start, end=None):
+        try:
+            with FETCH_SECONDS.time(provider=self.label):
+                return self.provider.fetch(tickers, start, end)
+        except Exception:
+            FETCH_ERRORS.inc(provider=self.label)
+            raise
+
+
+# 스냅샷 나이와 그림 캐시 적중/실패를 읽어오는 게이지 등록
+def watch_snapshots(snapshots, figure_cache):
+    def snapshot_collect():
+        snapshot = snapshots.latest
+        if snapshot is None:
+            return []
+        return [((), time.time() - snapshot.created_at.timestamp())]
+
+    REGISTRY.register(Gauge('snapshot_age_seconds', '현재 스냅샷이 만들어진 뒤 지난 시간', collect=snapshot_collect))
+    REGISTRY.register(Gauge('snapshot_version', '현재 스냅샷 버전', collect=lambda: (
+        [((), snapshots.latest.version)] if snapshots.latest else [])))
+    REGISTRY.register(Counter('figure_cache_requests_total', '그림 캐시 조회 수', ('result',), collect=lambda: [
+        (('hit',), figure_cache.hits), (('miss',), figure_cache.misses)]))
+    REGISTRY.register(Gauge('figure_cache_entries', '그림 캐시 항목 수', collect=lambda: [((), len(figure_cache))]))
+    REGISTRY.register(Gauge('snapshot_memory_bytes', '현재 스냅샷이 잡고 있는 배열 메모리 (mapped는 공유 memory-map)',
+                            ('field',), collect=lambda: (
+        [((name,), size) for name, size in snapshots.latest.memory_usage().items()] if snapshots.latest else [])))
+    REGISTRY.register(Gauge('process_resident_memory_bytes', '프로세스 RSS',
+                            collect=lambda: [((), resident_memory_bytes())]))
+
+
+# 현재 프로세스의 RSS (리눅스는 /proc, 그 외는 최대 RSS로 대신함)
+def resident_memory_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == 'darwin' else usage * 1024
+
+
+# waitress 작업 대기열 길이와 스레드 사용률 게이지 등록 (waitress.create_server로 띄운 경우)
+def watch_waitress(waitress_server):
+    dispatcher = waitress_server.task_dispatcher
+    REGISTRY.register(Gauge('waitress_queue_depth', '처리 대기 중인 요청 수',
+                            collect=lambda: [((), len(dispatcher.queue))]))
+    REGISTRY.register(Gauge('waitress_threads', 'waitress 작업 스레드 수',
+                            collect=lambda: [((), len(dispatcher.threads))]))
+    REGISTRY.register(Gauge('waitress_threads_active', '요청을 처리 중인 작업 스레드 수',
+                            collect=lambda: [((), dispatcher.active_count)]))
+
+
+# 느린 요청의 스택을 샘플링해서 flame graph용 folded stack 파일로 남기는 프로파일러
+class SlowRequestProfiler:
+    def __init__(self, threshold_ms=PROFILE_SLOW_MS, interval_ms=PROFILE_INTERVAL_MS, directory=PROFILE_DIR):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.directory = directory
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)  # 처리 중인 요청이 생기면 샘플링 스레드를 깨움
+        self._thread = None
+
+    def begin(self):
+        with self._wake:
+            self._active[threading.get_ident()] = collections.Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample_loop, name='slow-request-profiler', daemon=True)
+                self._thread.start()
+            self._wake.notify()
+
+    def end(self, label, elapsed):
+        with self._lock:
+            samples = self._active.pop(threading.get_ident(), None)
+        if samples and elapsed >= self.threshold:
+            self._dump(label, elapsed, samples)
+
+    # 프로파일 중인 요청이 있을 때만 interval마다 샘플링하고, 없으면 begin()이 깨울 때까지 잠듦
+    def _sample_loop(self):
+        while True:
+            with self._wake:
+                self._wake.wait_for(lambda: self._active)
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for thread_id, samples in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[self._fold(frame)] += 1
+
+    @staticmethod
+    def _fold(frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}')
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    def _dump(self, label, elapsed, samples):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f'{time.strftime("%Y%m%d-%H%M%S")}-{int(elapsed * 1000)}ms-{label.strip("/").replace("/", "_") or "root"}'
+        with open(os.path.join(self.directory, name + '.folded'), 'w', encoding='utf-8') as f:
+            for stack, count in samples.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+def _callback_name(app):
+    body = request.get_json(silent=True) or {}
+    output = body.get('output', '')
+    callback = app.callback_map.get(output, {}).get('callback')
+    return getattr(callback, '__name__', output)
+
+
+# Flask 요청 훅으로 요청/콜백 시간을 기록하고 /metrics 라우트 등록
+# 같은 서버에 두 번 설치하면 훅이 겹치므로 처음 설치한 것을 그대로 씀
+def install(server, app, profiler=None):
+    if 'metrics' in server.extensions:
+        return server.extensions['metrics']
+    if profiler is None and PROFILE_SLOW_MS > 0:
+        profiler = SlowRequestProfiler()
+
+    def in_flight_collect():
+        return [((), _in_flight)]
+
+    IN_FLIGHT.collect = in_flight_collect
+
+    @server.before_request
+    def start_timer():
+        global _in_flight
+        g.metrics_start = time.perf_counter()
+        with _in_flight_lock:
+            _in_flight += 1
+        if profiler is not None:
+            profiler.begin()
+
+    @server.teardown_request
+    def stop_timer(error=None):
+        global _in_flight
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return
+        with _in_flight_lock:
+            _in_flight -= 1
+        elapsed = time.perf_counter() - start
+        status = getattr(g, 'metrics_status', 500 if error else 200)
+        if request.path.endswith('_dash-update-component'):
+            CALLBACK_SECONDS.observe(elapsed, callback=_callback_name(app))
+        else:
+            REQUEST_SECONDS.observe(elapsed, endpoint=request.url_rule.rule if request.url_rule else 'unknown',
+                                    status=status)
+        if profiler is not None:
+            profiler.end(request.path, elapsed)
+
+    @server.after_request
+    def remember_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @server.route('/metrics')
+    def metrics():
+        return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+    server.extensions['metrics'] = profiler
+    return profiler
@@ -0,0 +1,86 @@
+import base64
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+
+
+# 그림 데이터를 typed array(base64)로 보내고 긴 시계열은 LTTB로 줄이는 모드 (COMPACT_FIGURES=0이면 끔)
+COMPACT_FIGURES = os.environ.get('COMPACT_FIGURES', '1') != '0'
+
+# 한 trace당 이 점 수를 넘으면 LTTB로 줄임
+DEFAULT_MAX_POINTS = int(os.environ.get('FIGURE_MAX_POINTS', '800'))
+
+
+# plotly.js typed array 형식 {'dtype': 'f4', 'bdata': base64}
+def encode_array(values, dtype='f4'):
+    array = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder('<'))
+    return {'dtype': dtype, 'bdata': base64.b64encode(array.tobytes()).decode('ascii')}
+
+
+# Largest-Triangle-Three-Buckets: 모양을 유지하면서 threshold개 점의 위치를 고름
+def lttb_indices(x, y, threshold):
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = np.nanmean(y[next_start:next_end]) if np.isfinite(y[next_start:next_end]).any() else 0.0
+        area = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        area = np.where(np.isnan(area), -1.0, area)
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+# 날짜 x값을 epoch 밀리초로 (plotly 5는 날짜를 datetime 객체 배열로, 그 이후 버전은 Timestamp/datetime64로 줌)
+def _to_milliseconds(x):
+    values = np.asarray(x)
+    if values.dtype == object and len(values) and isinstance(values[0], datetime.date):
+        values = pd.DatetimeIndex(values).values
+    if not np.issubdtype(values.dtype, np.datetime64):
+        return None
+    return values.astype('datetime64[ms]').astype(np.int64).astype(np.float64)
+
+
+# 날짜 인덱스를 epoch 밀리초 f8 typed array로
+def encode_dates(index):
+    return encode_array(_to_milliseconds(index), 'f8')
+
+
+# go.Figure를 trace 데이터가 typed array인 dict로 변환
+# 날짜 x축은 epoch 밀리초(f8)로 보내고 xaxis type을 date로 고정
+# typed=False면 다운샘플링만 하고 일반 배열로 보냄 (plotly extendTraces는 typed array 형식 데이터에 붙일 수 없음)
+def compact_figure(fig, max_points=DEFAULT_MAX_POINTS, typed=True):
+    figure = fig.to_plotly_json()
+    has_dates = False
+    for source, trace in zip(fig.data, figure['data']):
+        x, y = getattr(source, 'x', None), getattr(source, 'y', None)
+        if x is None or y is None or source.type != 'scatter':
+            continue  # 히트맵 등 시계열이 아닌 trace는 그대로
+        x_ms = _to_milliseconds(x)
+        x_values = x_ms if x_ms is not None else np.asarray(x, dtype=np.float64)
+        y_values = np.asarray(y, dtype=np.float64)
+        keep = lttb_indices(x_values, y_values, max_points)
+        if typed:
+            trace['x'] = encode_array(x_values[keep], 'f8')
+            trace['y'] = encode_array(y_values[keep], 'f4')
+        else:
+            trace['x'] = x_values[keep].tolist()
+            trace['y'] = [value if np.isfinite(value) else None for value in y_values[keep].tolist()]
+        has_dates = has_dates or x_ms is not None
+    if has_dates:
+        figure['layout'].setdefault('xaxis', {})['type'] = 'date'
+    return figure
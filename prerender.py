@@ -0,0 +1,333 @@
+import argparse
+import gzip
+import hashlib
+import html
+import json
+import logging
+import os
+import re
+import string
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import plotly
+from plotly.io.json import to_json_plotly
+
+import app as dashboard
+from payload import COMPACT_FIGURES, compact_figure
+from simulation import (SIMULATION_BLOCK_DAYS, SIMULATION_PATHS, SIMULATION_SEED, SIMULATION_YEARS,
+                        STRATEGY_ASSETS)
+from snapshot import SnapshotRefresher
+
+try:
+    import brotli  # 선택 의존성: 있으면 .br 파일도 만듦
+except ImportError:
+    brotli = None
+
+
+logger = logging.getLogger(__name__)
+
+# 정적 번들 기본 위치 (환경변수로 변경 가능)
+DEFAULT_OUTPUT_DIR = os.environ.get(
+    'PRERENDER_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'static'))
+
+# 그림 / 페이지를 만드는 코드가 바뀌면 올려서 모든 파일을 다시 만듦
+RENDER_VERSION = 1
+
+PLOTLY_JS = os.path.join(os.path.dirname(plotly.__file__), 'package_data', 'plotly.min.js')
+
+
+# 번들의 파일 하나: 입력 해시(inputs)가 지난 빌드와 같으면 render를 부르지 않고 그대로 둠
+@dataclass(frozen=True)
+class Artifact:
+    path: str
+    inputs: str
+    render: object
+
+
+def _digest(*parts):
+    digest = hashlib.sha1(f'{RENDER_VERSION}|{plotly.__version__}|{COMPACT_FIGURES}'.encode())
+    for part in parts:
+        if isinstance(part, (pd.Series, pd.DataFrame)):
+            index = part.index
+            # 날짜 인덱스는 값 그대로, 티커 인덱스(object)는 이름 목록으로
+            digest.update(repr(list(index)).encode() if index.dtype == object
+                          else np.ascontiguousarray(index.values).tobytes())
+            if isinstance(part, pd.DataFrame):
+                digest.update(repr(list(part.columns)).encode())
+            part = part.to_numpy(dtype=np.float64)
+        if isinstance(part, np.ndarray):
+            digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            digest.update(str(part).encode())
+        digest.update(b'|')
+    return digest.hexdigest()
+
+
+# 티커를 파일 이름으로 (바꾼 글자가 있으면 겹치지 않도록 해시를 붙임)
+def _file_name(asset):
+    safe = re.sub(r'[^A-Za-z0-9._-]', '_', asset)
+    if safe != asset:
+        safe += '-' + hashlib.sha1(asset.encode()).hexdigest()[:6]
+    return safe
+
+
+def _figure_json(fig):
+    return to_json_plotly(compact_figure(fig) if COMPACT_FIGURES else fig).encode('utf-8')
+
+
+def figure_artifacts(snapshot, assets):
+    artifacts = {}
+    for period in ('year', '6month'):
+        for resolution in ('daily', 'weekly', 'monthly'):
+            returns = dashboard.select_plot_assets(dashboard.get_returns_by_period(snapshot, period, resolution))
+            artifacts[f'returns-{period}-{resolution}'] = Artifact(
+                f'figures/returns-{period}-{resolution}.json', _digest('returns', period, returns),
+                lambda period=period, resolution=resolution: _figure_json(dashboard.render_figure(
+                    snapshot, 'returns', period=period, resolution=resolution)))
+
+    start = snapshot.returns_1y.index[0]
+    indicators = snapshot.indicators
+    for asset in [None] + list(assets):
+        column = asset or 'SPLG'
+        inputs = _digest('each', asset, snapshot.returns_1y[column],
+                         indicators.series('macd_osc', column).loc[start:], indicators.series('rsi', column).loc[start:])
+        name = f'each-{asset}' if asset else 'each'
+        path = f'figures/each/{_file_name(asset)}.json' if asset else 'figures/each.json'
+        artifacts[name] = Artifact(path, inputs, lambda asset=asset: _figure_json(
+            dashboard.render_figure(snapshot, 'each', asset=asset)))
+
+    backtest = snapshot.backtest
+    artifacts['backtest'] = Artifact(
+        'figures/backtest.json', _digest('backtest', backtest.equity if backtest is not None else None),
+        lambda: _figure_json(dashboard.render_figure(snapshot, 'backtest')))
+    # 상관계수 행렬 자체는 BLAS 계산 순서에 따라 마지막 자리가 달라질 수 있으므로 입력 가격 구간으로 비교
+    window = snapshot.risk.window
+    close = snapshot.close_history[dashboard.trace_assets(snapshot, 'year', 'daily')].iloc[-(window + 1):]
+    artifacts['risk'] = Artifact(
+        'figures/risk.json', _digest('risk', window, close),
+        lambda: _figure_json(dashboard.render_figure(snapshot, 'risk')))
+    # 시뮬레이션은 시드가 고정이므로 전략 자산 가격과 설정이 같으면 결과도 같음
+    strategy = [asset for asset in STRATEGY_ASSETS if asset in snapshot.close_history.columns]
+    inputs = _digest('simulation', SIMULATION_PATHS, SIMULATION_YEARS, SIMULATION_BLOCK_DAYS, SIMULATION_SEED,
+                     snapshot.close_history[strategy])
+    for kind in ('simulation', 'simulation-drawdown'):
+        artifacts[kind] = Artifact(f'figures/{kind}.json', inputs, lambda kind=kind: _figure_json(
+            dashboard.render_figure(snapshot, kind)))
+    return artifacts
+
+
+PAGE = string.Template('''<!DOCTYPE html>
+<html lang="ko">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>변형듀얼모멘텀 투자</title>
+<script src="$plotly_js"></script>
+<style>
+body { font-family: sans-serif; margin: 0 auto; max-width: 1600px; text-align: center; }
+h1, h2 { margin: 30px; }
+.decision { white-space: pre-line; }
+.chart { height: 80vh; }
+.cards { display: flex; flex-wrap: wrap; justify-content: center; margin-top: 20px; }
+.card { margin: 10px; border: 1px solid #ccc; border-radius: 5px; padding: 10px; text-align: left; }
+.note { font-size: 13px; color: gray; }
+label { margin-right: 15px; }
+</style>
+</head>
+<body>
+<h1>변형듀얼모멘텀 투자</h1>
+<h2 class="decision">$decision</h2>
+<h2>최근 1년 ETF 별 수익률 비교</h2>
+$resolution_1y
+<div id="return-plot-1y" class="chart"></div>
+<h2>최근 6개월 ETF 별 수익률 비교</h2>
+$resolution_6m
+<div id="return-plot-6m" class="chart"></div>
+<h2>매수/매도 타이밍 찾기</h2>
+<select id="asset-selector" style="margin: 30px 0 10px 10px; width: 400px;">
+<option value="">자세히 볼 종목을 선택하세요.(with. RSI / MACD)</option>
+$asset_options
+</select>
+<div id="return-each" class="chart" style="height: 90vh;"></div>
+<h2>전략 백테스트 (월간 리밸런싱)</h2>
+<div id="backtest-plot" class="chart" style="height: 70vh;"></div>
+<h2>위험 지표 (상관계수)</h2>
+<div id="correlation-heatmap" class="chart"></div>
+<h2>앞으로 $simulation_years년 결과 분포 (몬테카를로 시뮬레이션)</h2>
+<div id="simulation-plot" class="chart" style="height: 70vh;"></div>
+<div id="simulation-drawdown" class="chart" style="height: 50vh;"></div>
+<h2>전략 및 ETF에 대한 간략한 설명</h2>
+<div class="cards"><div class="card" style="width: 700px;">
+$strategy_rules
+</div></div>
+<div class="cards">
+$descriptions
+</div>
+<p class="note">데이터 기준일 $as_of</p>
+<p class="note"> **투자의 모든 책임은 본인에게 있습니다. 해당 자료는 정확성 및 신뢰도를 보장할 수 없습니다. 참고용으로만 활용하시기 바랍니다.</p>
+<script>
+const FIGURES = $figures;
+function show(id, name) {
+  fetch(FIGURES[name]).then(r => r.json()).then(f => Plotly.react(id, f.data, f.layout, {responsive: true}));
+}
+for (const [id, period] of [['return-plot-1y', 'year'], ['return-plot-6m', '6month']]) {
+  document.querySelectorAll(`input[data-target="$${id}"]`).forEach(input =>
+    input.addEventListener('change', () => show(id, `returns-$${period}-$${input.value}`)));
+  show(id, `returns-$${period}-daily`);
+}
+document.getElementById('asset-selector').addEventListener('change', event =>
+  show('return-each', event.target.value ? `each-$${event.target.value}` : 'each'));
+show('return-each', 'each');
+show('backtest-plot', 'backtest');
+show('correlation-heatmap', 'risk');
+show('simulation-plot', 'simulation');
+show('simulation-drawdown', 'simulation-drawdown');
+</script>
+</body>
+</html>
+''')
+
+
+def _resolution_selector(target):
+    options = [('daily', '일봉'), ('weekly', '주봉'), ('monthly', '월봉')]
+    return '<div>' + ''.join(
+        f'<label><input type="radio" name="{target}" data-target="{target}" value="{value}"'
+        f'{" checked" if value == "daily" else ""}> {label}</label>'
+        for value, label in options) + '</div>'
+
+
+def render_page(snapshot, assets, urls):
+    escape = html.escape
+    rules = ''.join(
+        f'<p style="margin-left: 15px; white-space: pre;">{escape(text)}</p>' if indented else f'<p>{escape(text)}</p>'
+        for text, indented in dashboard.STRATEGY_RULES)
+    descriptions = ''.join(
+        f'<div class="card" style="width: 420px;"><h4>{escape(asset)}</h4><p>{escape(description)}</p></div>'
+        for asset, description in dashboard.described_assets)
+    page = PAGE.substitute(
+        plotly_js=urls['plotly.min.js'],
+        decision=escape(dashboard.investment_decision(None, snapshot)),
+        resolution_1y=_resolution_selector('return-plot-1y'),
+        resolution_6m=_resolution_selector('return-plot-6m'),
+        asset_options=''.join(f'<option value="{escape(asset)}">{escape(asset)}</option>' for asset in assets),
+        strategy_rules=rules,
+        descriptions=descriptions,
+        as_of=snapshot.as_of.strftime('%Y-%m-%d'),
+        simulation_years=SIMULATION_YEARS,
+        figures=json.dumps({name: url for name, url in urls.items() if name != 'plotly.min.js'},
+                           ensure_ascii=False).replace('</', '<\\/'),
+    )
+    return page.encode('utf-8')
+
+
+def _write_atomic(path, body):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+# 원본과 미리 압축한 .gz / .br (정적 서버의 gzip_static / brotli_static 등이 그대로 보냄)
+def write_file(output, path, body):
+    target = os.path.join(output, path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    _write_atomic(target, body)
+    _write_atomic(target + '.gz', gzip.compress(body, compresslevel=9, mtime=0))
+    if brotli is not None:
+        _write_atomic(target + '.br', brotli.compress(body, quality=11))
+
+
+def remove_file(output, path):
+    for suffix in ('', '.gz', '.br'):
+        try:
+            os.remove(os.path.join(output, path + suffix))
+        except FileNotFoundError:
+            pass
+
+
+def read_manifest(output):
+    try:
+        with open(os.path.join(output, 'manifest.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'artifacts': {}}
+
+
+# 스냅샷으로 정적 번들을 만듦 (입력이 바뀐 파일만 다시 씀)
+#   <output>/index.html                 : 판단 메시지, 전략 설명, 그래프 자리 (그림은 브라우저에서 JSON으로 불러옴)
+#   <output>/figures/*.json             : 1년/6개월 수익률(일봉/주봉/월봉), 백테스트, 상관계수, 시뮬레이션
+#   <output>/figures/each/<티커>.json   : 종목별 수익률과 MACD/RSI
+#   <output>/plotly.min.js
+#   <output>/manifest.json              : 파일별 입력 해시와 내용 해시 (다음 빌드에서 비교)
+# 모든 파일에 .gz(.br) 압축본을 같이 씀. 페이지는 내용 해시를 ?v=로 붙여 참조하므로
+# index.html만 짧게 캐시하고 나머지는 오래 캐시해도 됨
+def build(snapshot, output=DEFAULT_OUTPUT_DIR, assets=None):
+    assets = list(assets if assets is not None else dashboard.assets.keys())
+    os.makedirs(output, exist_ok=True)
+    previous = read_manifest(output)['artifacts']
+
+    artifacts = {'plotly.min.js': Artifact('plotly.min.js', _digest('plotly.js'), lambda: _read(PLOTLY_JS))}
+    artifacts.update(figure_artifacts(snapshot, assets))
+
+    entries, written = {}, []
+    for name, artifact in artifacts.items():
+        entry = previous.get(name)
+        if entry and entry['inputs'] == artifact.inputs and entry['path'] == artifact.path \
+                and os.path.exists(os.path.join(output, artifact.path)):
+            entries[name] = entry
+            continue
+        body = artifact.render()
+        write_file(output, artifact.path, body)
+        entries[name] = {'path': artifact.path, 'inputs': artifact.inputs,
+                         'sha1': hashlib.sha1(body).hexdigest(), 'bytes': len(body)}
+        written.append(artifact.path)
+
+    # 페이지는 그림 파일의 내용 해시를 참조하므로 그림을 다 쓴 뒤에 만듦
+    urls = {name: f"{entry['path']}?v={entry['sha1'][:12]}" for name, entry in entries.items()}
+    page = render_page(snapshot, assets, urls)
+    page_entry = previous.get('index.html')
+    page_sha1 = hashlib.sha1(page).hexdigest()
+    if not page_entry or page_entry['sha1'] != page_sha1 or not os.path.exists(os.path.join(output, 'index.html')):
+        write_file(output, 'index.html', page)
+        written.append('index.html')
+    entries['index.html'] = {'path': 'index.html', 'inputs': page_sha1, 'sha1': page_sha1, 'bytes': len(page)}
+
+    removed = [entry['path'] for name, entry in previous.items() if name not in entries]
+    for path in removed:
+        remove_file(output, path)
+
+    manifest = {'as_of': snapshot.as_of.strftime('%Y-%m-%d'), 'artifacts': entries}
+    _write_atomic(os.path.join(output, 'manifest.json'), json.dumps(manifest, indent=1).encode('utf-8'))
+    logger.info('static bundle %s: %d written, %d unchanged, %d removed',
+                output, len(written), len(entries) - len(written), len(removed))
+    return written, removed
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='대시보드를 정적 파일 번들로 만들기')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_DIR, help='번들을 쓸 디렉토리')
+    parser.add_argument('--offline', action='store_true', help='가격을 새로 받지 않고 저장된 데이터만 사용')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    refresher = SnapshotRefresher(dashboard.store, dashboard.assets.keys())
+    # 번들은 한 번 만들고 끝나므로 시뮬레이션까지 바로 계산 (채워 줄 백그라운드 갱신이 없음)
+    snapshot = refresher.load_persisted(simulate=True) if args.offline else refresher.refresh()
+    if snapshot is None:
+        print('저장된 가격 데이터가 없습니다. --offline 없이 실행해서 먼저 받으세요.', file=sys.stderr)
+        return 1
+    written, removed = build(snapshot, args.output)
+    print(f'{args.output}: {len(written)} files written, {len(removed)} removed')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
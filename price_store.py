@@ -0,0 +1,211 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+
+# 가격 저장소 기본 위치 (환경변수로 변경 가능)
+DEFAULT_STORE_DIR = os.environ.get(
+    'PRICE_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'prices'))
+
+# 마지막 갱신 후 이 시간(초) 안에는 네트워크 요청을 생략 (여러 인스턴스 동시 재시작 시 rate limit 방지)
+DEFAULT_MIN_REFRESH_SECONDS = int(os.environ.get('PRICE_STORE_MIN_REFRESH', '900'))
+
+# 한 번에 제공자에게 요청할 티커 수 (큰 유니버스는 나눠서 받음)
+DEFAULT_BATCH_SIZE = int(os.environ.get('PRICE_STORE_BATCH_SIZE', '200'))
+
+
+def _empty_frame(tickers):
+    return pd.DataFrame(columns=list(tickers), index=pd.DatetimeIndex([], name='Date'), dtype=float)
+
+
+def _normalize_frame(frame, tickers):
+    # 제공자마다 다른 형태(시간대, Series 등)를 날짜 x 티커 float 프레임으로 통일
+    if isinstance(frame, pd.Series):
+        frame = frame.to_frame(tickers[0])
+    if frame.empty:
+        return _empty_frame(tickers)
+    index = pd.DatetimeIndex(frame.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    frame = frame.set_axis(index.normalize(), axis=0)
+    frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+    return frame.reindex(columns=list(tickers)).astype(float)
+
+
+# 야후 파이낸스 제공자
+class YahooProvider:
+    def __init__(self, field='Adj Close'):
+        self.field = field
+
+    def fetch(self, tickers, start, end=None):
+        import yfinance as yf  # 무거운 모듈이라 실제로 받을 때만 불러옴
+
+        data = yf.download(list(tickers), start=start, end=end, progress=False)
+        if data.empty:
+            return _empty_frame(tickers)
+        return _normalize_frame(data[self.field], tickers)
+
+
+# 로컬 CSV 제공자 (Date 컬럼 + 티커별 종가 컬럼) - 오프라인 실행이나 고정 데이터 테스트용
+class CSVProvider:
+    def __init__(self, path):
+        self.path = path
+
+    def fetch(self, tickers, start, end=None):
+        frame = _normalize_frame(pd.read_csv(self.path, index_col=0, parse_dates=True), tickers)
+        frame = frame.loc[pd.Timestamp(start):]
+        if end is not None:
+            frame = frame.loc[frame.index < pd.Timestamp(end)]
+        return frame
+
+
+# 날짜 x 티커 종가를 NumPy 컬럼 파일로 저장하고 memory-map으로 읽는 저장소
+#   <root>/meta.json            : 티커 목록, 요청 시작일, 현재 세대(generation), 마지막 갱신 시각
+#   <root>/<generation>/dates.npy : datetime64[D] 날짜 배열
+#   <root>/<generation>/close.npy : float64 (날짜 수 x 티커 수) 종가 행렬, 없는 값은 NaN
+# 새 데이터는 새 세대 디렉토리에 쓴 다음 meta.json을 os.replace로 교체하므로
+# 읽는 쪽은 항상 완성된 세대만 보게 됨
+class PriceStore:
+    def __init__(self, path=DEFAULT_STORE_DIR, provider=None, min_refresh_seconds=DEFAULT_MIN_REFRESH_SECONDS,
+                 batch_size=DEFAULT_BATCH_SIZE):
+        self.path = path
+        self.provider = provider or YahooProvider()
+        self.min_refresh_seconds = min_refresh_seconds
+        self.batch_size = batch_size
+
+    @property
+    def meta_path(self):
+        return os.path.join(self.path, 'meta.json')
+
+    def read_meta(self):
+        try:
+            with open(self.meta_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def load(self, tickers=None):
+        meta = self.read_meta()
+        if meta is None:
+            return _empty_frame(tickers or [])
+        directory = os.path.join(self.path, meta['generation'])
+        dates = np.load(os.path.join(directory, 'dates.npy'), mmap_mode='r')
+        close = np.load(os.path.join(directory, 'close.npy'), mmap_mode='r')
+        frame = pd.DataFrame(close, index=pd.DatetimeIndex(dates, name='Date'), columns=meta['tickers'], copy=False)
+        if tickers is not None:
+            frame = frame.reindex(columns=list(tickers))
+        return frame
+
+    def update(self, tickers, start, force=False):
+        tickers = list(tickers)
+        start = pd.Timestamp(start).normalize()
+        meta = self.read_meta()
+        stored = self.load()
+
+        if not force and meta is not None and self._is_fresh(meta, tickers, start):
+            return stored.reindex(columns=tickers)
+
+        known = [t for t in tickers if t in stored.columns]
+        missing = [t for t in tickers if t not in stored.columns]
+        fetched = []
+
+        # 저장소에 없는 티커는 시작일부터 전체를 받음
+        if missing:
+            fetched.append(self._fetch(missing, start=start))
+
+        if known:
+            # 요청 시작일이 예전에 받은 범위보다 앞이면 앞부분을 채움
+            stored_start = pd.Timestamp(meta['start'])
+            if start < stored_start:
+                fetched.append(self._fetch(known, start=start, end=stored_start))
+            # 마지막 저장일부터 받아서 당일 미완성 봉도 새 값으로 덮어씀
+            if not stored.empty:
+                fetched.append(self._fetch(known, start=stored.index[-1]))
+            else:
+                fetched.append(self._fetch(known, start=start))
+
+        merged = stored.reindex(columns=list(dict.fromkeys(list(stored.columns) + tickers)))
+        for frame in fetched:
+            frame = _normalize_frame(frame, list(frame.columns))
+            merged = frame.combine_first(merged).reindex(columns=merged.columns)
+
+        stored_start = pd.Timestamp(meta['start']) if meta else start
+        self._write(merged, min(start, stored_start))
+        return self.load(tickers)
+
+    def _fetch(self, tickers, start, end=None):
+        frames = [
+            _normalize_frame(self.provider.fetch(tickers[i:i + self.batch_size], start=start, end=end),
+                             tickers[i:i + self.batch_size])
+            for i in range(0, len(tickers), self.batch_size)
+        ]
+        return pd.concat(frames, axis=1) if len(frames) > 1 else frames[0]
+
+    # 다시 받을 필요 없이 저장된 데이터로 충분한지 (update가 네트워크를 쓰지 않을지)
+    def is_fresh(self, tickers, start):
+        meta = self.read_meta()
+        return meta is not None and self._is_fresh(meta, list(tickers), pd.Timestamp(start).normalize())
+
+    def _is_fresh(self, meta, tickers, start):
+        if any(t not in meta['tickers'] for t in tickers):
+            return False
+        if start < pd.Timestamp(meta['start']):
+            return False
+        return time.time() - meta.get('updated_at', 0) < self.min_refresh_seconds
+
+    def _write(self, frame, start):
+        frame = frame.sort_index()
+        os.makedirs(self.path, exist_ok=True)
+        generation = f'{time.time_ns()}-{os.getpid()}'
+        directory = os.path.join(self.path, generation)
+        os.makedirs(directory)
+        np.save(os.path.join(directory, 'dates.npy'), frame.index.values.astype('datetime64[D]'))
+        np.save(os.path.join(directory, 'close.npy'), np.ascontiguousarray(frame.to_numpy(dtype=np.float64)))
+
+        meta = {
+            'tickers': list(frame.columns),
+            'start': start.strftime('%Y-%m-%d'),
+            'generation': generation,
+            'updated_at': time.time(),
+        }
+        tmp_path = f'{self.meta_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+        self._prune(keep=generation)
+
+    def _prune(self, keep):
+        # 이전 세대는 하나만 남김 (아직 memory-map으로 읽고 있는 프로세스 보호)
+        generations = sorted(
+            name for name in os.listdir(self.path)
+            if os.path.isdir(os.path.join(self.path, name)) and name != keep)
+        for name in generations[:-1]:
+            shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+
+
+# 네트워크 가격 제공자 (PRICE_PROVIDER): yfinance(기본) / http
+# http는 야후 차트 API(비공개 v8 엔드포인트)를 연결 재사용 + 동시 요청으로 직접 부르는 선택 모드 (fetcher.HttpChartProvider)
+PRICE_PROVIDER = os.environ.get('PRICE_PROVIDER', 'yfinance')
+
+
+def _network_provider(name=PRICE_PROVIDER):
+    if name == 'yfinance':
+        return YahooProvider()
+    if name == 'http':
+        from fetcher import HttpChartProvider
+        return HttpChartProvider()
+    raise ValueError(f'알 수 없는 PRICE_PROVIDER: {name}')
+
+
+# 환경변수 PRICE_CSV가 있으면 CSV 제공자, 없으면 PRICE_PROVIDER 제공자를 쓰는 기본 저장소
+# 네트워크 제공자는 같은 (티커, 기간) 요청이 동시에 들어오면 한 번만 받도록 감쌈
+def default_store():
+    csv_path = os.environ.get('PRICE_CSV')
+    if csv_path:
+        return PriceStore(provider=CSVProvider(csv_path))
+    from fetcher import CoalescingProvider
+    return PriceStore(provider=CoalescingProvider(_network_provider()))
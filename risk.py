@@ -0,0 +1,204 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from indicators import VALUE_DTYPE, _rolling_sum, appended_rows
+
+
+# 연율화에 쓰는 1년 거래일 수
+TRADING_DAYS = 252
+
+# 변동성 / 샤프 / 상관계수를 계산하는 구간 (거래일)
+RISK_WINDOW = int(os.environ.get('RISK_WINDOW', '63'))
+
+
+def _log_prices(prices, last_log=None):
+    # 거래가 없는 날(NaN)은 직전 종가를 이어서 씀 (상장 전은 NaN)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_prices = np.log(prices)
+    if last_log is not None:
+        return np.where(np.isnan(log_prices), last_log, log_prices)
+    return pd.DataFrame(log_prices).ffill().to_numpy()
+
+
+def _volatility_sharpe(s1, s2, count, window):
+    # 구간이 꽉 찬 자산만 값이 있음 (rolling(window)와 같음)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = s1 / window
+        variance = np.maximum(s2 - s1 * mean, 0.0) / (window - 1)
+        std = np.sqrt(variance)
+        volatility = std * np.sqrt(TRADING_DAYS)
+        sharpe = mean / std * np.sqrt(TRADING_DAYS)
+    full = count >= window
+    return np.where(full, volatility, np.nan), np.where(full & (std > 0), sharpe, np.nan)
+
+
+def _correlation(returns, valid, window):
+    # 구간 수익률(구간 x 고른 자산)로 계산, 두 자산 모두 구간이 꽉 찬 경우만 값이 있고 가격이 그대로인 자산(분산 0)은 NaN
+    s1 = returns.sum(axis=0)
+    s2 = (returns * returns).sum(axis=0)
+    count = valid.sum(axis=0)
+    sxy = returns.T @ returns
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = sxy - np.outer(s1, s1) / window
+        variance = np.where(count >= window, s2 - s1 * s1 / window, np.nan)
+        scale = np.sqrt(np.where(variance > 0, variance, np.nan))
+        correlation = covariance / np.outer(scale, scale)
+    return np.clip(correlation, -1.0, 1.0)
+
+
+# 위험 지표 계산 결과
+#   volatility / sharpe : (날짜 x 자산) 최근 window 거래일 로그수익률 기준 연율화 변동성 / 샤프 지수 (무위험수익률 0)
+#   drawdown            : (날짜 x 자산) 그날까지의 최고가 대비 하락률
+#   max_drawdown        : (자산) 전체 기간 최대 낙폭
+#   recent_returns      : (window x 자산) 마지막 window 거래일 로그수익률 (거래가 없는 날은 0, recent_valid가 False)
+# 상관계수는 자산 x 자산 전체를 들고 있지 않고 correlation_frame에서 고른 자산만 recent_returns로 계산
+# (자산이 수천 개여도 보관 메모리는 window x 자산)
+# 행렬은 VALUE_DTYPE(float32)으로 보관하고, 구간 합 상태와 recent_returns는 float64
+# state는 다음 봉을 이어서 계산하기 위한 구간 합 (다른 프로세스에서 읽은 결과는 None)
+class RiskSet:
+    def __init__(self, index, columns, window, values, max_drawdown, recent_returns, recent_valid, state, last_row):
+        self.index = index
+        self.columns = list(columns)
+        self.window = window
+        self.values = values
+        self.max_drawdown = max_drawdown
+        self.recent_returns = recent_returns
+        self.recent_valid = recent_valid
+        self.state = state
+        self.last_row = last_row
+        self._positions = {asset: i for i, asset in enumerate(self.columns)}
+
+    # IndicatorEngine과 같은 증분 판단(appended_rows)을 쓰기 위한 이름
+    @property
+    def states(self):
+        return self.state
+
+    def series(self, name, asset):
+        return pd.Series(self.values[name][:, self._positions[asset]], index=self.index, name=asset)
+
+    # 자산별 마지막 날 지표 표 (자산 x 지표)
+    def latest(self, assets=None):
+        assets = list(assets) if assets is not None else self.columns
+        positions = [self._positions[asset] for asset in assets]
+        return pd.DataFrame({
+            'volatility': self.values['volatility'][-1, positions],
+            'sharpe': self.values['sharpe'][-1, positions],
+            'drawdown': self.values['drawdown'][-1, positions],
+            'max_drawdown': self.max_drawdown[positions],
+        }, index=assets)
+
+    # 고른 자산끼리의 마지막 window 거래일 로그수익률 상관계수 (자산 x 자산)
+    def correlation_frame(self, assets=None):
+        assets = list(assets) if assets is not None else self.columns
+        positions = [self._positions[asset] for asset in assets]
+        correlation = _correlation(self.recent_returns[:, positions], self.recent_valid[:, positions], self.window)
+        return pd.DataFrame(correlation.astype(VALUE_DTYPE), index=assets, columns=assets)
+
+
+# 전체 자산의 위험 지표를 한 번에 계산하고, 새 봉은 구간 합을 밀어서 이어서 계산
+#   compute : 누적합 차이(구간 합)와 누적 최댓값으로 전체 기간을 한 번에 계산
+#   update  : 새 봉 한 줄에 대해 들어온 수익률을 더하고 구간에서 빠지는 수익률을 뺌
+#             상관계수는 구간 수익률만 밀어 두고, 화면에 그리는 자산에 대해서만 그때 계산
+# compute는 update를 날짜 순서대로 반복한 것과 같은 결과를 냄
+class RiskEngine:
+    def __init__(self, window=RISK_WINDOW):
+        self.window = window
+
+    def compute(self, close):
+        prices = close.to_numpy(dtype=np.float64)
+        n_dates, n_assets = prices.shape
+        window = self.window
+        log_prices = _log_prices(prices)
+        returns = np.diff(log_prices, axis=0, prepend=np.nan)
+        valid = ~np.isnan(returns)
+        returns = np.where(valid, returns, 0.0)
+
+        s1 = _rolling_sum(returns, window)
+        s2 = _rolling_sum(returns * returns, window)
+        count = _rolling_sum(valid.astype(np.float64), window)
+        volatility, sharpe = _volatility_sharpe(s1, s2, count, window)
+
+        peak = np.fmax.accumulate(log_prices, axis=0) if n_dates else log_prices
+        with np.errstate(invalid='ignore'):
+            drawdown = np.expm1(log_prices - peak)
+        max_drawdown = np.fmin.reduce(drawdown, axis=0) if n_dates else np.full(n_assets, np.nan)
+
+        # 마지막 구간만으로 상태(구간 합)를 만듦
+        tail = min(window, n_dates)
+        state = self.initial_state(n_assets)
+        if tail:
+            recent, recent_valid = returns[-tail:], valid[-tail:]
+            state['returns'][-tail:] = recent
+            state['valid'][-tail:] = recent_valid
+            state['s1'] = recent.sum(axis=0)
+            state['s2'] = (recent * recent).sum(axis=0)
+            state['count'] = recent_valid.sum(axis=0).astype(np.float64)
+            state['last_log'] = log_prices[-1].copy()
+            state['peak'] = peak[-1].copy()
+            state['max_drawdown'] = max_drawdown.copy()
+
+        values = {'volatility': volatility.astype(VALUE_DTYPE), 'sharpe': sharpe.astype(VALUE_DTYPE),
+                  'drawdown': drawdown.astype(VALUE_DTYPE)}
+        return self._result(close.index, close.columns, values, state, prices[-1].copy() if n_dates else None)
+
+    def initial_state(self, n_assets):
+        window = self.window
+        empty = np.full(n_assets, np.nan)
+        return {
+            'returns': np.zeros((window, n_assets)),
+            'valid': np.zeros((window, n_assets), dtype=bool),
+            's1': np.zeros(n_assets),
+            's2': np.zeros(n_assets),
+            'count': np.zeros(n_assets),
+            'last_log': empty,
+            'peak': empty,
+            'max_drawdown': empty,
+        }
+
+    def update(self, state, row):
+        log_price = _log_prices(row, state['last_log'])
+        value = log_price - state['last_log']
+        valid = ~np.isnan(value)
+        value = np.where(valid, value, 0.0)
+        old, old_valid = state['returns'][0], state['valid'][0]
+
+        s1 = state['s1'] + value - old
+        s2 = state['s2'] + value * value - old * old
+        count = state['count'] + valid - old_valid
+        volatility, sharpe = _volatility_sharpe(s1, s2, count, self.window)
+
+        peak = np.fmax(state['peak'], log_price)
+        with np.errstate(invalid='ignore'):
+            drawdown = np.expm1(log_price - peak)
+        max_drawdown = np.fmin(state['max_drawdown'], drawdown)
+
+        values = {'volatility': volatility, 'sharpe': sharpe, 'drawdown': drawdown}
+        return values, {
+            'returns': np.vstack([state['returns'][1:], value]),
+            'valid': np.vstack([state['valid'][1:], valid]),
+            's1': s1, 's2': s2, 'count': count,
+            'last_log': log_price, 'peak': peak, 'max_drawdown': max_drawdown,
+        }
+
+    def extend(self, previous, close):
+        new_rows = appended_rows(previous, close)
+        if new_rows is None:
+            return self.compute(close)
+        if not len(new_rows):
+            return previous
+
+        n_old = len(previous.index)
+        values = {name: np.vstack([matrix, np.full((len(new_rows), matrix.shape[1]), np.nan, dtype=VALUE_DTYPE)])
+                  for name, matrix in previous.values.items()}
+        state = previous.state
+        for offset, row in enumerate(new_rows):
+            row_values, state = self.update(state, row)
+            for name, value in row_values.items():
+                values[name][n_old + offset] = value
+        return self._result(close.index, close.columns, values, state, new_rows[-1].copy())
+
+    def _result(self, index, columns, values, state, last_row):
+        return RiskSet(index, columns, self.window, values, state['max_drawdown'], state['returns'], state['valid'],
+                       state, last_row)
@@ -0,0 +1,94 @@
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+
+import metrics
+
+
+logger = logging.getLogger(__name__)
+
+# 요청을 받는 워커 프로세스 수 (1이면 지금처럼 한 프로세스에서 데이터 갱신과 요청 처리를 모두 함)
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', '1'))
+
+# 워커 하나의 waitress 작업 스레드 수
+WORKER_THREADS = int(os.environ.get('WORKER_THREADS', '4'))
+
+
+# 한 프로세스에서 waitress 실행 (sockets를 주면 부모가 열어 둔 소켓을 같이 씀)
+def serve(wsgi_app, host='0.0.0.0', port=8000, sockets=None, threads=WORKER_THREADS):
+    from waitress import create_server
+
+    if sockets:
+        waitress_server = create_server(wsgi_app, sockets=sockets, threads=threads)
+    else:
+        waitress_server = create_server(wsgi_app, host=host, port=port, threads=threads)
+    metrics.watch_waitress(waitress_server)  # 작업 대기열 길이 / 스레드 사용률
+    waitress_server.run()
+
+
+def _coordinate(make_refresher):
+    refresher = make_refresher()
+    refresher.load_persisted()
+    refresher.start(refresh_now=True)
+    threading.Event().wait()
+
+
+def _spawn(target):
+    pid = os.fork()
+    if pid:
+        return pid
+    # 자식 프로세스: 부모의 종료 신호 처리기를 되돌리고 target만 실행
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    code = 0
+    try:
+        target()
+    except Exception:
+        logger.exception('worker process failed')
+        code = 1
+    finally:
+        os._exit(code)
+
+
+# 다중 프로세스 실행 (fork가 되는 플랫폼만)
+#   코디네이터 1개: 가격을 받아 스냅샷을 만들고 공유 디렉토리에 씀 (요청은 받지 않음)
+#   워커 N개: 부모가 연 소켓 하나로 요청을 나눠 받고, 스냅샷은 memory-map으로 읽기만 함
+# 부모는 스레드 없이 자식만 관리하고, 죽은 자식은 같은 역할로 다시 띄움
+# fork가 안 되면 코디네이터가 없으므로 워커 앱 대신 스스로 스냅샷을 만드는 make_app()으로 한 프로세스만 띄움
+def serve_workers(make_worker_app, make_refresher, make_app, host='0.0.0.0', port=8000, workers=WEB_CONCURRENCY):
+    if not hasattr(os, 'fork'):
+        logger.warning('os.fork is not available; serving with a single process')
+        serve(make_app(), host=host, port=port)
+        return
+
+    listener = socket.create_server((host, port), backlog=1024)
+    roles = {
+        'coordinator': lambda: _coordinate(make_refresher),
+        'worker': lambda: serve(make_worker_app(), sockets=[listener]),
+    }
+    children = {_spawn(roles['coordinator']): 'coordinator'}
+    for _ in range(workers):
+        children[_spawn(roles['worker'])] = 'worker'
+
+    def shutdown(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    logger.info('serving on %s:%d with %d workers', host, port, workers)
+
+    while True:
+        pid, status = os.wait()
+        role = children.pop(pid, None)
+        if role is None:
+            continue
+        logger.warning('%s process %d exited (status %d); restarting', role, pid, status)
+        children[_spawn(roles[role])] = role
@@ -0,0 +1,268 @@
+import datetime
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from backtest import BacktestResult
+from indicators import IndicatorSet
+from risk import RiskSet
+from simulation import SimulationResult
+from snapshot import MarketSnapshot, SnapshotRefresher
+from windows import LogPriceIndex
+
+
+logger = logging.getLogger(__name__)
+
+# 코디네이터가 스냅샷을 쓰고 워커가 memory-map으로 읽는 위치 (환경변수로 변경 가능)
+DEFAULT_SNAPSHOT_DIR = os.environ.get(
+    'SHARED_SNAPSHOT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'snapshot'))
+
+# 워커가 새 스냅샷이 올라왔는지 확인하는 주기 (초)
+DEFAULT_POLL_SECONDS = float(os.environ.get('SHARED_SNAPSHOT_POLL', '5'))
+
+# close_history의 뒷부분인 구간 (시작 행 위치만 저장, 수익률 / 주봉 / 월봉은 워커가 필요할 때 만듦)
+SLICES = ('start_1y', 'start_6m')
+
+# 경로별 시뮬레이션 결과 배열 (simulation.SimulationResult 필드)
+SIMULATION_ARRAYS = ('terminal', 'max_drawdown', 'benchmark_terminal', 'benchmark_max_drawdown')
+
+
+def _save_frame(directory, name, frame):
+    np.save(os.path.join(directory, f'{name}.dates.npy'), frame.index.values)
+    np.save(os.path.join(directory, f'{name}.npy'), np.ascontiguousarray(frame.to_numpy()))
+    return list(frame.columns)
+
+
+def _load_array(directory, name):
+    return np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+
+
+def _load_frame(directory, name, columns):
+    index = pd.DatetimeIndex(np.load(os.path.join(directory, f'{name}.dates.npy')))
+    values = _load_array(directory, name)
+    if values.ndim == 1:
+        return pd.Series(values, index=index, copy=False)
+    return pd.DataFrame(values, index=index, columns=columns, copy=False)
+
+
+# 스냅샷을 새 세대 디렉토리에 NumPy 파일로 쓰고 current.json을 os.replace로 교체
+#   <root>/current.json                 : 현재 세대, 버전, 생성 시각, 프레임별 열 이름
+#   <root>/<generation>/<field>.npy     : (날짜 수 x 자산 수) 값 행렬 (스냅샷과 같은 형식, 가격 / 지표는 float32)
+#   <root>/<generation>/<field>.dates.npy : datetime64 날짜 배열
+def write_snapshot(snapshot, path=DEFAULT_SNAPSHOT_DIR):
+    os.makedirs(path, exist_ok=True)
+    generation = f'{time.time_ns()}-{os.getpid()}'
+    directory = os.path.join(path, generation)
+    os.makedirs(directory)
+
+    columns = {'close_history': _save_frame(directory, 'close_history', snapshot.close_history)}
+    slices = {name: getattr(snapshot, name) for name in SLICES}
+
+    np.save(os.path.join(directory, 'last_close.npy'), snapshot.last_close.to_numpy(dtype=np.float64))
+    np.save(os.path.join(directory, 'log_prices.npy'), np.ascontiguousarray(snapshot.log_prices.log_prices))
+
+    indicators = snapshot.indicators
+    for name, values in indicators.values.items():
+        np.save(os.path.join(directory, f'indicator.{name}.npy'), np.ascontiguousarray(values))
+
+    risk = snapshot.risk
+    for name, values in risk.values.items():
+        np.save(os.path.join(directory, f'risk.{name}.npy'), np.ascontiguousarray(values))
+    np.save(os.path.join(directory, 'risk.max_drawdown.npy'), np.ascontiguousarray(risk.max_drawdown))
+    np.save(os.path.join(directory, 'risk.recent_returns.npy'), np.ascontiguousarray(risk.recent_returns))
+    np.save(os.path.join(directory, 'risk.recent_valid.npy'), np.ascontiguousarray(risk.recent_valid))
+
+    simulation = None
+    if snapshot.simulation is not None:
+        result = snapshot.simulation
+        np.save(os.path.join(directory, 'simulation.equity_bands.npy'),
+                np.ascontiguousarray(result.equity_bands.to_numpy()))
+        for name in SIMULATION_ARRAYS:
+            np.save(os.path.join(directory, f'simulation.{name}.npy'), np.ascontiguousarray(getattr(result, name)))
+        simulation = {
+            'percentiles': [int(column) for column in result.equity_bands.columns],
+            'years': result.years,
+            'block_days': result.block_days,
+            'sample_start': result.sample_start.isoformat(),
+            'sample_end': result.sample_end.isoformat(),
+        }
+
+    backtest = None
+    if snapshot.backtest is not None:
+        result = snapshot.backtest
+        _save_frame(directory, 'backtest.equity', result.equity.to_frame())
+        _save_frame(directory, 'backtest.turnover', result.turnover.to_frame())
+        backtest = {
+            'holdings': _save_frame(directory, 'backtest.holdings', result.holdings),
+            'cagr': result.cagr,
+            'max_drawdown': result.max_drawdown,
+            'sharpe': result.sharpe,
+            'volatility': result.volatility,
+        }
+
+    meta = {
+        'generation': generation,
+        'version': snapshot.version,
+        'created_at': snapshot.created_at.isoformat(),
+        'columns': columns,
+        'slices': slices,
+        'indicators': {'names': list(indicators.values), 'columns': list(indicators.columns)},
+        'risk': {'names': list(risk.values), 'window': risk.window},
+        'backtest': backtest,
+        'simulation': simulation,
+        'simulation_pending': snapshot.simulation_pending,
+    }
+    meta_path = os.path.join(path, 'current.json')
+    tmp_path = f'{meta_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+    _prune(path, keep=generation)
+    return generation
+
+
+def _prune(path, keep):
+    # 이전 세대는 하나만 남김 (아직 붙어 있는 워커가 다음 확인 때 넘어갈 수 있도록)
+    generations = sorted(
+        name for name in os.listdir(path)
+        if os.path.isdir(os.path.join(path, name)) and name != keep)
+    for name in generations[:-1]:
+        shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+
+
+def read_meta(path=DEFAULT_SNAPSHOT_DIR):
+    try:
+        with open(os.path.join(path, 'current.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+# 저장된 스냅샷을 memory-map으로 붙여서 MarketSnapshot으로 만듦 (값은 복사하지 않음)
+def read_snapshot(path=DEFAULT_SNAPSHOT_DIR, meta=None):
+    meta = meta or read_meta(path)
+    if meta is None:
+        return None
+    directory = os.path.join(path, meta['generation'])
+    history = _load_frame(directory, 'close_history', meta['columns']['close_history'])
+
+    names = meta['indicators']['names']
+    indicators = IndicatorSet(history.index, meta['indicators']['columns'],
+                              {name: _load_array(directory, f'indicator.{name}') for name in names},
+                              states=None, last_row=None)
+
+    risk = RiskSet(history.index, meta['indicators']['columns'], meta['risk']['window'],
+                   {name: _load_array(directory, f'risk.{name}') for name in meta['risk']['names']},
+                   _load_array(directory, 'risk.max_drawdown'), _load_array(directory, 'risk.recent_returns'),
+                   _load_array(directory, 'risk.recent_valid'),
+                   state=None, last_row=None)
+
+    backtest = None
+    if meta['backtest'] is not None:
+        backtest = BacktestResult(
+            equity=_load_frame(directory, 'backtest.equity', None).iloc[:, 0],
+            holdings=_load_frame(directory, 'backtest.holdings', meta['backtest']['holdings']),
+            turnover=_load_frame(directory, 'backtest.turnover', None).iloc[:, 0],
+            cagr=meta['backtest']['cagr'],
+            max_drawdown=meta['backtest']['max_drawdown'],
+            sharpe=meta['backtest']['sharpe'],
+            volatility=meta['backtest']['volatility'],
+        )
+    simulation = None
+    if meta.get('simulation') is not None:
+        bands = _load_array(directory, 'simulation.equity_bands')
+        simulation = SimulationResult(
+            equity_bands=pd.DataFrame(bands, index=pd.RangeIndex(len(bands), name='month'),
+                                      columns=meta['simulation']['percentiles'], copy=False),
+            years=meta['simulation']['years'],
+            block_days=meta['simulation']['block_days'],
+            sample_start=pd.Timestamp(meta['simulation']['sample_start']),
+            sample_end=pd.Timestamp(meta['simulation']['sample_end']),
+            **{name: _load_array(directory, f'simulation.{name}') for name in SIMULATION_ARRAYS},
+        )
+    log_prices = LogPriceIndex(history.index.values, history.columns, _load_array(directory, 'log_prices'))
+    return MarketSnapshot(
+        version=meta['version'],
+        created_at=datetime.datetime.fromisoformat(meta['created_at']),
+        close_history=history,
+        indicators=indicators,
+        backtest=backtest,
+        log_prices=log_prices,
+        risk=risk,
+        last_close=pd.Series(np.load(os.path.join(directory, 'last_close.npy')), index=history.columns),
+        simulation=simulation,
+        simulation_pending=meta.get('simulation_pending', False),
+        **meta['slices'],
+    )
+
+
+# 코디네이터: 스냅샷을 만들 때마다 공유 디렉토리에 씀
+# 재시작해도 워커의 캐시 키가 겹치지 않도록 버전은 이전에 쓴 버전 다음부터
+class PublishingRefresher(SnapshotRefresher):
+    def __init__(self, store, tickers, path=DEFAULT_SNAPSHOT_DIR, **kwargs):
+        meta = read_meta(path)
+        super().__init__(store, tickers, first_version=meta['version'] + 1 if meta else 1, **kwargs)
+        self.path = path
+
+    def _build(self, fetch=True, simulate=None):
+        snapshot = super()._build(fetch, simulate)
+        write_snapshot(snapshot, self.path)
+        return snapshot
+
+
+# 워커: 코디네이터가 쓴 스냅샷에 읽기 전용으로 붙고, 새 세대가 올라오면 갈아 끼움
+# SnapshotRefresher와 같은 인터페이스 (latest / current / load_persisted / start / stop)
+class SharedSnapshotReader:
+    def __init__(self, path=DEFAULT_SNAPSHOT_DIR, interval=DEFAULT_POLL_SECONDS):
+        self.path = path
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._generation = None
+        self._snapshot = None
+
+    @property
+    def latest(self):
+        return self._snapshot
+
+    @property
+    def current(self):
+        if self._snapshot is None and self.load_persisted() is None:
+            raise RuntimeError(f'공유 스냅샷이 아직 없습니다: {self.path}')
+        return self._snapshot
+
+    def load_persisted(self):
+        meta = read_meta(self.path)
+        if meta is None or meta['generation'] == self._generation:
+            return self._snapshot
+        with self._lock:
+            if meta['generation'] != self._generation:
+                self._snapshot = read_snapshot(self.path, meta)
+                self._generation = meta['generation']
+                logger.info('attached to shared snapshot v%d', self._snapshot.version)
+        return self._snapshot
+
+    def start(self, refresh_now=False):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='shared-snapshot-reader', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.load_persisted()
+            except Exception:
+                # 쓰는 도중 정리된 세대 등: 다음 확인 때 다시 시도
+                logger.exception('shared snapshot attach failed')
@@ -0,0 +1,206 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from backtest import BENCHMARK_ASSET, STRATEGY_ASSETS, dual_momentum_weights, period_end_positions
+
+
+# 시뮬레이션 경로 수 / 기간(년)
+SIMULATION_PATHS = int(os.environ.get('SIMULATION_PATHS', '10000'))
+SIMULATION_YEARS = int(os.environ.get('SIMULATION_YEARS', '5'))
+
+# 한 번에 뽑는 과거 일간 수익률 묶음 길이 (거래일, 자산 간 상관과 단기 추세를 같이 유지)
+SIMULATION_BLOCK_DAYS = int(os.environ.get('SIMULATION_BLOCK_DAYS', '21'))
+
+# 한 번에 메모리에 올리는 경로 수 (경로 x 거래일 x 자산 float32 배열 크기를 제한)
+SIMULATION_CHUNK = int(os.environ.get('SIMULATION_CHUNK', '500'))
+
+# 경로 묶음을 나눠 계산할 프로세스 수 (1이면 현재 프로세스에서 계산)
+SIMULATION_WORKERS = int(os.environ.get('SIMULATION_WORKERS', '1'))
+
+# 같은 가격이면 같은 결과가 나오도록 고정한 난수 시드 (경로 묶음마다 SeedSequence로 나눔)
+SIMULATION_SEED = int(os.environ.get('SIMULATION_SEED', '0'))
+
+# 시뮬레이션의 한 달 (거래일)
+MONTH_DAYS = 21
+TRADING_DAYS = 252
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# 시뮬레이션 결과
+#   equity_bands : (경과 개월 x 백분위) 전략 평가금액 분포 (시작 = 1)
+#   terminal / max_drawdown : 경로별 기말 평가금액과 최대 낙폭
+#   benchmark_*  : 같은 경로에서 기준자산만 보유했을 때
+@dataclass(frozen=True)
+class SimulationResult:
+    equity_bands: pd.DataFrame
+    terminal: np.ndarray
+    max_drawdown: np.ndarray
+    benchmark_terminal: np.ndarray
+    benchmark_max_drawdown: np.ndarray
+    years: int
+    block_days: int
+    sample_start: pd.Timestamp
+    sample_end: pd.Timestamp
+
+    @property
+    def paths(self):
+        return len(self.terminal)
+
+    # 항목별 백분위 표 (항목 x 백분위)
+    def percentiles(self):
+        rows = {
+            '누적 수익률': self.terminal - 1,
+            '연평균 수익률(CAGR)': np.power(self.terminal, 1 / self.years) - 1,
+            '최대 낙폭(MDD)': self.max_drawdown,
+            f'{BENCHMARK_ASSET} 보유 누적 수익률': self.benchmark_terminal - 1,
+            f'{BENCHMARK_ASSET} 보유 최대 낙폭': self.benchmark_max_drawdown,
+        }
+        return pd.DataFrame({name: np.percentile(values, PERCENTILES) for name, values in rows.items()},
+                            index=[f'{p}%' for p in PERCENTILES]).T
+
+    def loss_probability(self):
+        return float((self.terminal < 1).mean())
+
+    def drawdown_probability(self, threshold):
+        return float((self.max_drawdown <= threshold).mean())
+
+
+# 과거 가격에서 시뮬레이션 입력을 만듦
+#   returns : 모든 전략 자산의 가격이 있는 날들의 일간 로그수익률 (날짜 x 자산)
+#   seed    : 첫 리밸런싱 판단에 쓰는 실제 월말 로그가격 (마지막 줄 = 최근 종가 기준 0)
+def prepare_inputs(close, lookback):
+    close = close[list(STRATEGY_ASSETS)].sort_index().ffill()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_prices = np.log(close.to_numpy(dtype=np.float64))
+    returns = np.diff(log_prices, axis=0)
+    complete = ~np.isnan(returns).any(axis=1)
+    month_ends = period_end_positions(close.index)[-(lookback + 1):]
+    seed = log_prices[month_ends] - log_prices[-1]
+    dates = close.index[1:][complete]
+    return returns[complete], seed, dates
+
+
+def _bootstrap(returns, paths, days, block_days, rng):
+    # 경로마다 과거 구간에서 block_days 길이 묶음의 시작 위치를 뽑아 이어 붙임 (경로 x 거래일 x 자산)
+    blocks = -(-days // block_days)
+    starts = rng.integers(0, len(returns) - block_days + 1, size=(paths, blocks))
+    rows = (starts[:, :, None] + np.arange(block_days)).reshape(paths, -1)[:, :days]
+    return returns[rows]
+
+
+def _max_drawdown(equity):
+    return (equity / np.maximum.accumulate(equity, axis=1) - 1).min(axis=1)
+
+
+# 경로 묶음 하나를 시뮬레이션: 부트스트랩한 일간 수익률로 가격 경로를 만들고 매달 같은 규칙으로 리밸런싱
+# 월말 가격 행렬(경로 x 월 x 자산)에 backtest.dual_momentum_weights를 그대로 적용하고,
+# 리밸런싱 사이에는 backtest.simulate_rebalancing처럼 매수 후 보유(비중 드리프트)로 일별 평가금액을 계산
+def simulate_chunk(returns, seed, paths, months, block_days, rng, **rule):
+    days = months * MONTH_DAYS
+    log_path = np.cumsum(_bootstrap(returns, paths, days, block_days, rng), axis=1)
+    columns = list(STRATEGY_ASSETS)
+    benchmark = columns.index(rule.get('benchmark', BENCHMARK_ASSET))
+
+    # 실제 월말 가격 뒤에 시뮬레이션 월말 가격을 붙여서 판단 (마지막 판단은 쓰지 않음)
+    month_log = np.concatenate([np.broadcast_to(seed, (paths,) + seed.shape),
+                                log_path[:, MONTH_DAYS - 1::MONTH_DAYS][:, :-1]], axis=1)
+    weights = dual_momentum_weights(np.exp(month_log), columns, **rule)[:, len(seed) - 1:]
+    cash = 1.0 - weights.sum(axis=2)
+
+    # 달마다 월초 대비 상대가격 (경로 x 월 x 거래일 x 자산)
+    base = np.concatenate([np.zeros((paths, 1, len(columns)), dtype=log_path.dtype),
+                           log_path[:, MONTH_DAYS - 1:-1:MONTH_DAYS]], axis=1)
+    relative = np.exp(log_path.reshape(paths, months, MONTH_DAYS, -1) - base[:, :, None, :])
+    growth = np.einsum('pmda,pma->pmd', relative, weights.astype(relative.dtype)) + cash[:, :, None]
+
+    month_growth = growth[:, :, -1].astype(np.float64)
+    month_values = np.concatenate([np.ones((paths, 1)), np.cumprod(month_growth, axis=1)], axis=1)
+    equity = (month_values[:, :-1, None] * growth).reshape(paths, days)
+    equity = np.concatenate([np.ones((paths, 1)), equity], axis=1)
+    benchmark_equity = np.exp(np.concatenate([np.zeros((paths, 1)), log_path[:, :, benchmark]], axis=1))
+    return {
+        'month_values': month_values.astype(np.float32),
+        'terminal': equity[:, -1],
+        'max_drawdown': _max_drawdown(equity),
+        'benchmark_terminal': benchmark_equity[:, -1],
+        'benchmark_max_drawdown': _max_drawdown(benchmark_equity),
+    }
+
+
+# 작업 프로세스 전역: 부트스트랩 표본 (프로세스마다 한 번만 받음)
+_worker = {}
+
+
+def _attach(returns, seed, months, block_days, rule):
+    _worker.update(returns=returns, seed=seed, months=months, block_days=block_days, rule=rule)
+
+
+def _run_chunk(task):
+    paths, seed_sequence = task
+    return simulate_chunk(_worker['returns'], _worker['seed'], paths, _worker['months'], _worker['block_days'],
+                          np.random.default_rng(seed_sequence), **_worker['rule'])
+
+
+# close(날짜 x 자산) 일간 가격으로 전략을 paths개 경로, years년 앞으로 시뮬레이션
+# 경로는 chunk개씩 나눠 계산하고 경로별 요약과 월말 평가금액만 모음 (메모리는 chunk 크기로 제한)
+# 묶음마다 시드를 따로 나누므로 workers 수와 상관없이 결과가 같음
+def simulate(close, paths=SIMULATION_PATHS, years=SIMULATION_YEARS, block_days=SIMULATION_BLOCK_DAYS,
+             chunk=SIMULATION_CHUNK, workers=SIMULATION_WORKERS, seed=SIMULATION_SEED, **rule):
+    lookback = max(rule.get('offensive_lookback', 12), rule.get('defensive_lookback', 6))
+    returns, seed_log, dates = prepare_inputs(close, lookback)
+    if len(returns) < block_days or len(seed_log) <= lookback:
+        raise ValueError('시뮬레이션할 과거 데이터가 부족합니다.')
+    months = years * TRADING_DAYS // MONTH_DAYS
+    sizes = [min(chunk, paths - start) for start in range(0, paths, chunk)]
+    tasks = list(zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))))
+    init_args = (returns.astype(np.float32), seed_log, months, block_days, rule)
+
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_attach,
+                                 initargs=init_args) as pool:
+            chunks = list(pool.map(_run_chunk, tasks))
+    else:
+        _attach(*init_args)
+        chunks = [_run_chunk(task) for task in tasks]
+
+    merged = {key: np.concatenate([result[key] for result in chunks]) for key in chunks[0]}
+    bands = np.percentile(merged.pop('month_values'), PERCENTILES, axis=0).T
+    return SimulationResult(
+        equity_bands=pd.DataFrame(bands, index=pd.RangeIndex(months + 1, name='month'),
+                                  columns=list(PERCENTILES)),
+        years=years,
+        block_days=block_days,
+        sample_start=dates[0],
+        sample_end=dates[-1],
+        **merged,
+    )
+
+
+if __name__ == '__main__':
+    import time
+
+    from price_store import default_store
+
+    parser = argparse.ArgumentParser(description='변형 듀얼모멘텀 몬테카를로(블록 부트스트랩) 시뮬레이션')
+    parser.add_argument('--paths', type=int, default=SIMULATION_PATHS)
+    parser.add_argument('--years', type=int, default=SIMULATION_YEARS)
+    parser.add_argument('--block-days', type=int, default=SIMULATION_BLOCK_DAYS)
+    parser.add_argument('--chunk', type=int, default=SIMULATION_CHUNK)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=SIMULATION_SEED)
+    args = parser.parse_args()
+
+    close = default_store().load(list(STRATEGY_ASSETS))
+    started = time.perf_counter()
+    result = simulate(close, paths=args.paths, years=args.years, block_days=args.block_days, chunk=args.chunk,
+                      workers=args.workers, seed=args.seed)
+    print(f'{result.paths:,} paths x {result.years}y in {time.perf_counter() - started:.1f}s '
+          f'(sample {result.sample_start:%Y-%m-%d} ~ {result.sample_end:%Y-%m-%d})')
+    with pd.option_context('display.width', 200, 'display.float_format', '{:.2%}'.format):
+        print(result.percentiles().to_string())
+    print(f'loss probability {result.loss_probability():.1%}')
@@ -0,0 +1,334 @@
+import datetime
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from functools import cached_property
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+from backtest import run_backtest
+from indicators import IndicatorEngine
+from metrics import SNAPSHOT_BUILD_SECONDS
+from risk import RiskEngine
+from simulation import STRATEGY_ASSETS, simulate
+from windows import LogPriceIndex, window_base, window_start
+
+
+logger = logging.getLogger(__name__)
+
+# 기본 갱신 시각: 미국 장 마감 이후 (환경변수로 변경 가능)
+DEFAULT_REFRESH_AT = os.environ.get('SNAPSHOT_REFRESH_AT', '16:30')
+DEFAULT_REFRESH_TZ = os.environ.get('SNAPSHOT_REFRESH_TZ', 'America/New_York')
+# 초 단위 간격을 주면 매일 정해진 시각 대신 일정 간격으로 갱신
+DEFAULT_REFRESH_INTERVAL = int(os.environ.get('SNAPSHOT_REFRESH_INTERVAL', '0')) or None
+
+# 백테스트용으로 저장소에 유지할 과거 데이터 기간 (년)
+HISTORY_YEARS = int(os.environ.get('PRICE_HISTORY_YEARS', '20'))
+
+# MACD / RSI 지표 엔진 (스냅샷마다 전체 자산을 한 번에 계산해 둠)
+indicator_engine = IndicatorEngine()
+
+# 변동성 / 샤프 / 낙폭 / 상관계수 엔진 (지표와 같이 새 봉만 이어서 계산)
+risk_engine = RiskEngine()
+
+
+def _history_start():
+    return pd.Timestamp.today().normalize() - pd.DateOffset(years=HISTORY_YEARS)
+
+
+def _cumulative_returns(close):
+    if close.empty:
+        return close
+    return close / window_base(close) - 1
+
+
+# 스냅샷이 들고 있는 정규 가격 행렬: 날짜 x 자산 float32 한 덩어리 (C 연속)
+def canonical_prices(close):
+    values = np.ascontiguousarray(close.to_numpy(dtype=np.float32))
+    return pd.DataFrame(values, index=close.index, columns=close.columns, copy=False)
+
+
+def _root_array(array):
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array
+
+
+def _arrays(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return [value.to_numpy()]
+    if isinstance(value, np.ndarray):
+        return [value]
+    if isinstance(value, dict):
+        return [array for item in value.values() for array in _arrays(item)]
+    return []
+
+
+# 한 시점의 시장 데이터 묶음. 만들어진 뒤에는 바꾸지 않음 (콜백은 참조만 읽음)
+# 가격은 정규 행렬(close_history) 하나만 들고, 1년/6개월 구간은 그 뒷부분 view
+# 수익률과 주봉/월봉은 처음 읽을 때 한 번 계산해서 스냅샷에 붙여 둠 (스냅샷이 바뀌면 같이 버려짐)
+@dataclass(frozen=True)
+class MarketSnapshot:
+    version: int
+    created_at: datetime.datetime
+    close_history: pd.DataFrame   # 정규 가격 행렬 (canonical_prices)
+    start_1y: int                 # 1년 구간 첫 행 위치
+    start_6m: int                 # 6개월 구간 첫 행 위치
+    indicators: object
+    backtest: object
+    log_prices: object   # 아무 구간 수익률을 O(1)로 구하는 누적 로그 가격 (windows.LogPriceIndex)
+    risk: object         # 자산별 위험 지표와 상관계수 (risk.RiskSet)
+    last_close: pd.Series  # 자산별 마지막 종가 float64 (주문 수량 / 금액 계산용, 분석 행렬만 float32)
+    simulation: object   # 전략의 앞으로 몇 년 결과 분포 (simulation.SimulationResult, 전략 자산이 없으면 None)
+    simulation_pending: bool = False  # 시작 스냅샷이라 시뮬레이션을 아직 안 함 (백그라운드 스레드가 저장된 데이터로 채움)
+
+    @cached_property
+    def close_data(self):
+        return self.close_history.iloc[self.start_1y:]
+
+    @cached_property
+    def close_data_6m(self):
+        return self.close_history.iloc[self.start_6m:]
+
+    @cached_property
+    def returns_1y(self):
+        return _cumulative_returns(self.close_data)
+
+    @cached_property
+    def returns_6m(self):
+        return _cumulative_returns(self.close_data_6m)
+
+    @property
+    def daily_returns(self):
+        return self.returns_1y
+
+    @property
+    def daily_returns_6m(self):
+        return self.returns_6m
+
+    @cached_property
+    def weekly_returns(self):
+        return _cumulative_returns(self.close_data.resample('W').last())
+
+    @cached_property
+    def monthly_returns(self):
+        return _cumulative_returns(self.close_data.resample('ME').last())
+
+    @cached_property
+    def weekly_returns_6m(self):
+        return _cumulative_returns(self.close_data_6m.resample('W').last())
+
+    @cached_property
+    def monthly_returns_6m(self):
+        return _cumulative_returns(self.close_data_6m.resample('ME').last())
+
+    @property
+    def as_of(self):
+        return self.close_history.index[-1]
+
+    # 스냅샷이 잡고 있는 배열 메모리 (항목별 바이트)
+    # 같은 버퍼를 보는 view는 처음 나온 항목에서 한 번만 세고, 아직 계산하지 않은 파생 프레임은 0
+    # 공유 스냅샷(memory-map)에서 읽은 배열은 프로세스 전용 메모리가 아니므로 mapped로 따로 셈
+    def memory_usage(self):
+        items = {
+            'close_history': self.close_history,
+            'log_prices': self.log_prices.log_prices,
+            'indicators': self.indicators.values,
+            'risk': {**self.risk.values, 'max_drawdown': self.risk.max_drawdown,
+                     'recent_returns': self.risk.recent_returns, 'recent_valid': self.risk.recent_valid},
+        }
+        if self.backtest is not None:
+            items['backtest'] = {'equity': self.backtest.equity, 'holdings': self.backtest.holdings,
+                                 'turnover': self.backtest.turnover}
+        for name in ('close_data', 'close_data_6m', 'returns_1y', 'returns_6m', 'weekly_returns',
+                     'monthly_returns', 'weekly_returns_6m', 'monthly_returns_6m'):
+            items[name] = self.__dict__.get(name)
+        simulation = self.simulation
+        if simulation is not None:
+            items['simulation'] = {'equity_bands': simulation.equity_bands, 'terminal': simulation.terminal,
+                                   'max_drawdown': simulation.max_drawdown,
+                                   'benchmark_terminal': simulation.benchmark_terminal,
+                                   'benchmark_max_drawdown': simulation.benchmark_max_drawdown}
+
+        seen, usage = set(), {'mapped': 0}
+        for name, value in items.items():
+            usage[name] = 0
+            for array in _arrays(value):
+                root = _root_array(array)
+                if id(root) in seen:
+                    continue
+                seen.add(id(root))
+                if isinstance(root, np.memmap):
+                    usage['mapped'] += root.nbytes
+                else:
+                    usage[name] += root.nbytes
+        return usage
+
+    def info(self):
+        return {
+            'version': self.version,
+            'created_at': self.created_at.isoformat(),
+            'as_of': self.as_of.strftime('%Y-%m-%d'),
+        }
+
+
+# 블록 부트스트랩 몬테카를로 (몇 초 걸리므로 요청 스레드가 아니라 스냅샷을 만들 때 계산)
+# 시드가 고정이므로 전략 자산 가격이 이전 스냅샷과 같으면 이전 결과를 그대로 씀
+def _simulate(close_history, previous=None):
+    try:
+        strategy = close_history[list(STRATEGY_ASSETS)]
+        if previous is not None and previous.simulation is not None \
+                and previous.close_history[list(STRATEGY_ASSETS)].equals(strategy):
+            return previous.simulation
+        return simulate(strategy)
+    except (KeyError, ValueError):
+        # 전략 자산이 없거나 기간이 부족한 유니버스
+        return None
+
+
+# 가격 저장소를 갱신하고 정규 가격 행렬, 보조지표, 위험 지표, 백테스트, 몬테카를로 시뮬레이션을 만듦
+# (1년/6개월 수익률과 일봉/주봉/월봉 프레임은 MarketSnapshot이 필요할 때 만듦)
+# 이전 스냅샷이 있으면 보조지표와 위험 지표는 새로 들어온 봉만 이어서 계산
+# fetch=False면 네트워크 없이 디스크에 저장된 데이터만 사용
+# simulate=False면 몇 초 걸리는 시뮬레이션을 건너뛰고 simulation_pending으로 표시 (기본은 fetch와 같음)
+def build_snapshot(store, tickers, version, previous=None, fetch=True, simulate=None):
+    if simulate is None:
+        simulate = fetch
+    start = _history_start()
+    # 저장소는 예전 데이터도 계속 들고 있으므로 두 경로 모두 같은 시작일로 자름
+    # (시작 스냅샷과 첫 갱신의 행이 같은 날에서 시작해야 지표를 이어서 계산하고 백테스트 구간도 HISTORY_YEARS로 유지)
+    if fetch:
+        stored = store.update(list(tickers), start=start)
+    else:
+        stored = store.load(list(tickers))
+    stored = stored.loc[start:]
+    close_history = canonical_prices(stored)
+    last_close = stored.ffill().iloc[-1].astype(np.float64) if len(stored) else pd.Series(np.nan, index=stored.columns)
+
+    index = close_history.index
+    indicators = indicator_engine.extend(previous.indicators if previous else None, close_history)
+    risk = risk_engine.extend(previous.risk if previous else None, close_history)
+    try:
+        backtest = run_backtest(close_history)
+    except ValueError:
+        # 전략 자산이 없거나 기간이 부족한 유니버스
+        backtest = None
+    return MarketSnapshot(
+        version=version,
+        created_at=datetime.datetime.now(datetime.timezone.utc),
+        close_history=close_history,
+        start_1y=window_start(index, pd.DateOffset(years=1)),
+        start_6m=window_start(index, pd.DateOffset(months=6)),
+        indicators=indicators,
+        backtest=backtest,
+        log_prices=LogPriceIndex.from_close(close_history),
+        risk=risk,
+        last_close=last_close,
+        simulation=_simulate(close_history, previous) if simulate else None,
+        simulation_pending=not simulate,
+    )
+
+
+# 백그라운드 스레드에서 스냅샷을 다시 만들고 참조를 통째로 교체
+# 참조 대입은 원자적이므로 콜백은 잠금 없이 current를 읽고, 항상 완성된 스냅샷만 봄
+class SnapshotRefresher:
+    def __init__(self, store, tickers, refresh_at=DEFAULT_REFRESH_AT, timezone=DEFAULT_REFRESH_TZ,
+                 interval=DEFAULT_REFRESH_INTERVAL, first_version=1):
+        self.store = store
+        self.tickers = list(tickers)
+        self.refresh_at = datetime.time.fromisoformat(refresh_at)
+        self.timezone = ZoneInfo(timezone)
+        self.interval = interval
+        self.first_version = first_version
+        self._build_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._snapshot = None
+
+    # 준비된 스냅샷 (아직 없으면 만들지 않고 None)
+    @property
+    def latest(self):
+        return self._snapshot
+
+    @property
+    def current(self):
+        if self._snapshot is None:
+            with self._build_lock:
+                if self._snapshot is None:
+                    self._build()
+        return self._snapshot
+
+    def refresh(self):
+        # 동시에 여러 번 만들지 않도록 빌드만 직렬화 (읽는 쪽은 잠그지 않음)
+        with self._build_lock:
+            return self._build()
+
+    # 시작할 때 마지막으로 저장된 데이터로 바로 스냅샷을 만듦 (stale-while-revalidate)
+    # 저장소가 비었거나 티커가 빠져 있으면 None을 돌려주고 백그라운드 갱신을 기다림
+    # 시뮬레이션은 기본으로 건너뛰고 start()의 백그라운드 스레드가 저장된 데이터로 채움 (서버가 몇 초씩 늦게 뜨지 않도록)
+    def load_persisted(self, simulate=False):
+        meta = self.store.read_meta()
+        if meta is None or not set(self.tickers) <= set(meta['tickers']):
+            return None
+        with self._build_lock:
+            if self._snapshot is None:
+                self._build(fetch=False, simulate=simulate)
+        return self._snapshot
+
+    def _build(self, fetch=True, simulate=None):
+        version = self._snapshot.version + 1 if self._snapshot else self.first_version
+        with SNAPSHOT_BUILD_SECONDS.time():
+            snapshot = build_snapshot(self.store, self.tickers, version, previous=self._snapshot, fetch=fetch,
+                                      simulate=simulate)
+        self._snapshot = snapshot
+        logger.info('market snapshot v%d built (as of %s)', snapshot.version, snapshot.as_of.date())
+        return snapshot
+
+    def seconds_until_next(self, now=None):
+        if self.interval:
+            return self.interval
+        now = now or datetime.datetime.now(self.timezone)
+        next_run = datetime.datetime.combine(now.date(), self.refresh_at, tzinfo=self.timezone)
+        if next_run <= now:
+            next_run += datetime.timedelta(days=1)
+        return (next_run - now).total_seconds()
+
+    # refresh_now=True면 다음 갱신 시각을 기다리지 않고 바로 한 번 새로 받음
+    def start(self, refresh_now=False):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(refresh_now,), name='snapshot-refresher',
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, refresh_now=False):
+        # 시작 스냅샷에 빠진 시뮬레이션은 네트워크를 기다리지 않고 저장된 데이터로 먼저 채움
+        # (가격을 받는 데 실패하거나 오래 걸려도 브라우저가 계속 기다리지 않도록)
+        self._fill_simulation()
+        # 방금 저장된 데이터로 만든 스냅샷이면 다시 받을 것이 없으므로 건너뜀
+        if refresh_now and not (self._snapshot is not None and self.store.is_fresh(self.tickers, _history_start())):
+            self._refresh_quietly()
+        while not self._stop.wait(self.seconds_until_next()):
+            self._refresh_quietly()
+
+    def _fill_simulation(self):
+        try:
+            with self._build_lock:
+                if self._snapshot is not None and self._snapshot.simulation_pending:
+                    self._build(fetch=False, simulate=True)
+        except Exception:
+            logger.exception('market snapshot simulation failed')
+
+    def _refresh_quietly(self):
+        try:
+            self.refresh()
+        except Exception:
+            # 갱신에 실패해도 이전 스냅샷으로 계속 서비스
+            logger.exception('market snapshot refresh failed')
@@ -1,28 +1,23 @@
-import yfinance as yf
 import plotly.graph_objects as go
 import streamlit as st
 import pandas as pd
+from live import LIVE_POLL_MS, LiveBoard, default_feed, is_market_open
+from price_store import default_store
+from universe import DEFAULT_ASSETS
+from windows import window_start
 
 # 자산 설명
-assets = {
-    'SPLG': 'SPLG는 S&P 500 지수를 추적하는 ETF입니다.',
-    'QQQM': 'QQQM은 NASDAQ-100 지수를 추적하는 ETF입니다.',
-    'EFA': 'EFA는 북미 외의 선진국 대형주를 추적하는 ETF입니다.',
-    'SHY': 'SHY는 단기 미국 국채를 추적하는 ETF입니다.',
-    'IEF': 'IEF는 중기 미국 국채를 추적하는 ETF입니다.',
-    'TLT': 'TLT는 장기 미국 국채를 추적하는 ETF입니다.',
-    'TIP': 'TIP는 미국 물가 연동 채권(TIPS)을 추적하는 ETF입니다.',
-    'LQD': 'LQD는 투자적격 등급의 회사채를 추적하는 ETF입니다.',
-    'HYG': 'HYG는 고수익(정크) 회사채를 추적하는 ETF입니다.',
-    'RWX': 'RWX는 국제 부동산 투자 신탁(REITs)을 추적하는 ETF입니다.',
-    'EMB': 'EMB는 신흥 시장 채권을 추적하는 ETF입니다.'
-}
+assets = DEFAULT_ASSETS
 
-# 데이터 다운로드
+# 데이터 로드 (로컬 가격 저장소에 새 봉만 받아서 병합)
+# 1년/6개월 구간은 대시보드 스냅샷과 같이 오늘이 아니라 마지막 가격 날짜에서 잼 (저장소가 오래됐거나 주말이어도 비지 않음)
 @st.cache_data
 def download_data():
-    data_1y = yf.download(list(assets.keys()), period='1y')['Adj Close']
-    data_6m = yf.download(list(assets.keys()), period='6mo')['Adj Close']
+    today = pd.Timestamp.today().normalize()
+    close_history = default_store().update(list(assets.keys()), start=today - pd.DateOffset(years=1))
+    index = close_history.index
+    data_1y = close_history.iloc[window_start(index, pd.DateOffset(years=1)):]
+    data_6m = close_history.iloc[window_start(index, pd.DateOffset(months=6)):]
     return data_1y, data_6m
 
 data_1y, data_6m = download_data()
@@ -75,3 +70,25 @@ if splg_return_1y > 0:
     st.success(f"SPLG의 최근 1년 수익률은 양수({splg_return_1y:.2%})입니다. SPLG에 투자하세요!")
 else:
     st.warning(f"SPLG의 최근 1년 수익률은 음수({splg_return_1y:.2%})입니다. 다른 투자 대안을 고려하세요.")
+
+# 장중 실시간 모드 (LIVE_QUOTES=simulated|yahoo): 이 부분만 주기적으로 다시 실행해서 시세만 반영
+live_feed = default_feed()
+if live_feed is not None:
+    live_board = LiveBoard(data_1y, data_1y, data_6m)
+
+    @st.fragment(run_every=LIVE_POLL_MS / 1000)
+    def live_panel():
+        st.header("실시간 시세")
+        if live_feed.market_hours_only and not is_market_open():
+            st.info("정규장 시간이 아닙니다.")
+            return
+        tick = live_board.tick(live_feed.quotes(live_board.tickers, live_board.last_close))
+        live_return = tick.returns_1y['SPLG'].iloc[-1]
+        st.caption(f"{tick.time:%H:%M:%S} 기준")
+        if live_return > 0:
+            st.success(f"SPLG의 실시간 1년 수익률은 양수({live_return:.2%})입니다.")
+        else:
+            st.warning(f"SPLG의 실시간 1년 수익률은 음수({live_return:.2%})입니다.")
+        st.dataframe(pd.DataFrame(tick.ranking, columns=['종목', '수익률']))
+
+    live_panel()
@@ -0,0 +1,107 @@
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from backtest import BENCHMARK_ASSET, DEFENSIVE_ASSETS, OFFENSIVE_ASSETS, backtest_prices, period_end_positions
+
+
+# 비교할 자산군 (이름: (공격자산, 방어자산))
+UNIVERSES = {
+    'default': (OFFENSIVE_ASSETS, DEFENSIVE_ASSETS),
+    'us_equity': (('SPLG', 'QQQM'), DEFENSIVE_ASSETS),
+    'treasury_only': (OFFENSIVE_ASSETS, ('SHY', 'IEF', 'TLT', 'TIP')),
+}
+
+DEFAULT_GRID = {
+    'offensive_lookback': [3, 6, 9, 12],
+    'defensive_lookback': [1, 3, 6, 12],
+    'top_n': [1, 2, 3, 4],
+    'rebalance_months': [1, 2, 3],
+    'universe': list(UNIVERSES),
+}
+
+# 순위 기준 (모두 클수록 좋음, max_drawdown은 음수)
+DEFAULT_SORT = ('sharpe', 'cagr', 'max_drawdown')
+
+
+def parameter_grid(grid=None):
+    grid = grid or DEFAULT_GRID
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+
+# 작업 프로세스 전역: 공유 메모리에 붙인 가격 행렬 (프로세스마다 한 번만 붙임)
+_worker = {}
+
+
+def _attach(shm_name, shape, dates, columns, warmup):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    prices = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    prices.flags.writeable = False
+    index = pd.DatetimeIndex(dates)
+    _worker.update(shm=shm, prices=prices, index=index, columns=columns,
+                   month_ends=period_end_positions(index), warmup=warmup)
+
+
+def _evaluate(config):
+    offensive, defensive = UNIVERSES[config['universe']]
+    result = backtest_prices(
+        _worker['index'], _worker['prices'], _worker['columns'], _worker['month_ends'],
+        rebalance_months=config['rebalance_months'], warmup=_worker['warmup'],
+        benchmark=BENCHMARK_ASSET, offensive=offensive, defensive=defensive,
+        offensive_lookback=config['offensive_lookback'], defensive_lookback=config['defensive_lookback'],
+        top_n=config['top_n'])
+    row = dict(config)
+    row.update(result.summary())
+    return row
+
+
+# 파라미터 조합을 프로세스 풀에서 평가하고 순위표를 반환
+# 가격 행렬은 공유 메모리에 한 번만 올리고 작업 프로세스는 복사 없이 읽기 전용으로 붙음
+def run_sweep(close, grid=None, workers=None, sort_by=DEFAULT_SORT):
+    configs = parameter_grid(grid)
+    close = close.sort_index().ffill()
+    prices = close.to_numpy(dtype=np.float64)
+    warmup = max(max(c['offensive_lookback'], c['defensive_lookback']) for c in configs)
+
+    shm = shared_memory.SharedMemory(create=True, size=max(prices.nbytes, 1))
+    try:
+        np.ndarray(prices.shape, dtype=np.float64, buffer=shm.buf)[:] = prices
+        init_args = (shm.name, prices.shape, close.index.values, list(close.columns), warmup)
+        workers = workers or os.cpu_count()
+        chunksize = max(1, len(configs) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=init_args) as pool:
+            rows = list(pool.map(_evaluate, configs, chunksize=chunksize))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    results = pd.DataFrame(rows)
+    for key in sort_by:
+        results[f'{key}_rank'] = results[key].rank(ascending=False, method='min')
+    results['rank'] = results[[f'{key}_rank' for key in sort_by]].mean(axis=1)
+    return results.sort_values(['rank'] + list(sort_by), ascending=[True] + [False] * len(sort_by),
+                               ignore_index=True)
+
+
+if __name__ == '__main__':
+    from price_store import default_store
+
+    parser = argparse.ArgumentParser(description='변형 듀얼모멘텀 파라미터 스윕')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--sort', nargs='+', default=list(DEFAULT_SORT))
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--out', help='전체 결과를 저장할 CSV 경로')
+    args = parser.parse_args()
+
+    tickers = sorted({asset for offensive, defensive in UNIVERSES.values() for asset in offensive + defensive})
+    results = run_sweep(default_store().load(tickers), workers=args.workers, sort_by=args.sort)
+    if args.out:
+        results.to_csv(args.out, index=False)
+    with pd.option_context('display.width', 200, 'display.max_columns', 20):
+        print(results.head(args.top).to_string())
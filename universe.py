@@ -0,0 +1,50 @@
+import csv
+import os
+
+import numpy as np
+
+
+# 전략에 꼭 필요한 기본 자산 (유니버스 파일이 있어도 항상 포함)
+DEFAULT_ASSETS = {
+    'SPLG': 'SPLG는 S&P 500 지수를 추적하는 ETF입니다.',
+    'QQQM': 'QQQM은 NASDAQ-100 지수를 추적하는 ETF입니다.',
+    'EFA': 'EFA는 북미 외의 선진국 대형주를 추적하는 ETF입니다.',
+    'SHY': 'SHY는 단기 미국 국채를 추적하는 ETF입니다.',
+    'IEF': 'IEF는 중기 미국 국채를 추적하는 ETF입니다.',
+    'TLT': 'TLT는 장기 미국 국채를 추적하는 ETF입니다.',
+    'TIP': 'TIP는 미국 물가 연동 채권(TIPS)을 추적하는 ETF입니다.',
+    'LQD': 'LQD는 투자적격 등급의 회사채를 추적하는 ETF입니다.',
+    'HYG': 'HYG는 고수익(정크) 회사채를 추적하는 ETF입니다.',
+    'RWX': 'RWX는 국제 부동산 투자 신탁(REITs)을 추적하는 ETF입니다.',
+    'EMB': 'EMB는 신흥 시장 채권을 추적하는 ETF입니다.'
+}
+
+# 유니버스 파일 경로 (CSV: ticker[,description] 또는 한 줄에 티커 하나인 텍스트)
+UNIVERSE_FILE = os.environ.get('UNIVERSE_FILE')
+
+
+def load_universe(path=UNIVERSE_FILE):
+    universe = dict(DEFAULT_ASSETS)
+    if not path:
+        return universe
+    with open(path, encoding='utf-8', newline='') as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip() or row[0].startswith('#'):
+                continue
+            ticker = row[0].strip().upper()
+            if ticker in ('TICKER', 'SYMBOL'):
+                continue  # 헤더 줄
+            description = row[1].strip() if len(row) > 1 else ''
+            universe.setdefault(ticker, description)
+    return universe
+
+
+# 점수 상위 k개 위치 (전체 정렬 없이 argpartition 후 k개만 정렬, NaN은 제외)
+def top_k(scores, k):
+    scores = np.asarray(scores, dtype=np.float64)
+    valid = np.flatnonzero(~np.isnan(scores))
+    k = min(k, len(valid))
+    if k == 0:
+        return valid[:0]
+    picks = valid[np.argpartition(-scores[valid], k - 1)[:k]]
+    return picks[np.argsort(-scores[picks], kind='stable')]
@@ -0,0 +1,114 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+# 기간 선택 버튼 (개월 수)
+LOOKBACK_MONTHS = {'1m': 1, '3m': 3, '6m': 6, '12m': 12}
+
+
+# 구간 누적 수익률의 기준 가격: 구간 첫날 종가 (그날 가격이 없는 종목은 NaN이라 수익률도 NaN)
+# 스냅샷의 returns_1y / returns_6m과 실시간 보드(live.LiveBoard)가 같이 씀
+def window_base(close):
+    return close.iloc[0]
+
+
+# 마지막 데이터 날짜에서 offset만큼 앞선 날의 행 위치 (저장된 데이터가 오늘보다 오래됐어도 구간이 유지됨)
+# 스냅샷의 1년/6개월 구간과 Streamlit 화면이 같이 씀
+def window_start(index, offset):
+    if not len(index):
+        return 0
+    return int(index.searchsorted(index[-1] - offset))
+
+
+# 자산별 누적 로그 가격 (날짜 x 자산). 아무 구간의 수익률도 두 줄의 차이로 자산마다 O(1)에 구함
+#   return(start, end) = exp(log_price[end] - log_price[start]) - 1
+# 거래가 없는 날(NaN)은 직전 종가로 채우고, 상장 전처럼 직전 값이 없으면 NaN
+# 행렬은 float32로 보관하고 두 줄의 차이는 float64로 계산
+class LogPriceIndex:
+    def __init__(self, dates, columns, log_prices):
+        self.dates = np.asarray(dates, dtype='datetime64[ns]')
+        self.columns = list(columns)
+        self.log_prices = log_prices
+
+    @classmethod
+    def from_close(cls, close):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_prices = np.log(close.ffill().to_numpy(dtype=np.float64)).astype(np.float32)
+        return cls(close.index.values, close.columns, log_prices)
+
+    @property
+    def first_date(self):
+        return pd.Timestamp(self.dates[0])
+
+    @property
+    def last_date(self):
+        return pd.Timestamp(self.dates[-1])
+
+    # date 이전(포함) 마지막 거래일 위치, date가 첫 날보다 앞이면 0
+    def position(self, date=None):
+        if date is None:
+            return len(self.dates) - 1
+        position = int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(date), 'ns'), side='right')) - 1
+        return max(position, 0)
+
+    # date 이후(포함) 첫 거래일 위치 (close.loc[date:]의 첫 줄과 같음)
+    def start_position(self, date):
+        position = int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(date), 'ns'), side='left'))
+        return min(position, len(self.dates) - 1)
+
+    def returns_between_positions(self, start, end):
+        with np.errstate(invalid='ignore'):
+            return np.expm1(self.log_prices[end].astype(np.float64) - self.log_prices[start])
+
+    # 두 날짜 사이 수익률 (start 이후 첫 거래일 ~ end 이전 마지막 거래일)
+    def window_returns(self, start, end=None):
+        return self.returns_between_positions(self.start_position(start), self.position(end))
+
+    # as_of(없으면 마지막 거래일)부터 months개월 전까지의 수익률
+    # 스냅샷의 returns_1y / returns_6m 마지막 줄과 같은 구간 (거래일 수 기준은 trailing_returns)
+    # months개월 전이 첫 날보다 앞이면 구간을 줄이지 않고 전부 NaN (trailing_returns와 같음)
+    def lookback_returns(self, months, as_of=None):
+        as_of = pd.Timestamp(as_of) if as_of is not None else self.last_date
+        start = as_of - pd.DateOffset(months=months)
+        if start < self.first_date:
+            return np.full(len(self.columns), np.nan)
+        return self.window_returns(start, as_of)
+
+    # 마지막(또는 as_of) 거래일 기준 days 거래일 전 대비 수익률
+    def trailing_returns(self, days, as_of=None):
+        end = self.position(as_of)
+        if days > end:
+            return np.full(len(self.columns), np.nan)
+        return self.returns_between_positions(end - days, end)
+
+    # as_of 날짜의 전략 판단용 한 줄짜리 프레임 묶음
+    def point_in_time(self, as_of=None):
+        end = self.position(as_of)
+        index = pd.DatetimeIndex([self.dates[end]])
+
+        def row(values):
+            return pd.DataFrame(np.asarray(values)[None, :], index=index, columns=self.columns)
+
+        return PointInTime(
+            close_data=row(np.exp(self.log_prices[end].astype(np.float64))),
+            returns_1y=row(self.lookback_returns(12, index[0])),
+            returns_6m=row(self.lookback_returns(6, index[0])),
+        )
+
+
+# investment_decision / target_weights에 스냅샷 대신 넘길 수 있는 과거 한 시점의 가격과 수익률
+@dataclass(frozen=True)
+class PointInTime:
+    close_data: pd.DataFrame
+    returns_1y: pd.DataFrame
+    returns_6m: pd.DataFrame
+
+    @property
+    def as_of(self):
+        return self.close_data.index[-1]
+
+    @property
+    def last_close(self):
+        return self.close_data.iloc[-1]